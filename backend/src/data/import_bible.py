@@ -3,10 +3,15 @@
 Script para importar dados bíblicos completos do arquivo PorBLivre.json
 """
 
-import json
 import sqlite3
 import os
+import sys
 from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.bulk_import import import_pragmas, load_scripture, format_rate
+from src.services.json_stream import iter_json_array
+from src.services.schema import create_scripture_schema, create_scripture_indexes
 
 def create_database():
     """Cria o banco de dados com as tabelas necessárias"""
@@ -15,43 +20,9 @@ def create_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Criar tabelas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            testament TEXT NOT NULL,
-            book_order INTEGER NOT NULL,
-            chapters_count INTEGER NOT NULL
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chapters (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER NOT NULL,
-            chapter_number INTEGER NOT NULL,
-            verses_count INTEGER NOT NULL,
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS verses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER NOT NULL,
-            chapter_number INTEGER NOT NULL,
-            verse_number INTEGER NOT NULL,
-            text TEXT NOT NULL,
-            version TEXT DEFAULT 'PorBLivre',
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
-    
-    # Criar índices para performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verses_book_chapter ON verses (book_id, chapter_number)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verses_search ON verses (book_id, chapter_number, verse_number)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_books_order ON books (book_order)')
+    # Criar tabelas e índices para performance
+    create_scripture_schema(cursor)
+    create_scripture_indexes(cursor)
     
     conn.commit()
     conn.close()
@@ -144,6 +115,24 @@ def translate_book_name(english_name):
     
     return translations.get(english_name, english_name)
 
+def iter_bible_verses(json_path):
+    """Ler o arquivo JSON livro a livro e gerar tuplas (livro, capítulo, versículo, texto)"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        # O id do livro é a sua ordem canônica, estável entre importações
+        for book_order, book_data in enumerate(iter_json_array(f, 'books'), 1):
+            book_name_en = book_data['name']
+            book = {
+                'order': book_order,
+                'name': translate_book_name(book_name_en),
+                'testament': get_testament(book_name_en)
+            }
+            
+            for chapter_data in book_data['chapters']:
+                for verse_data in chapter_data['verses']:
+                    yield book, chapter_data['chapter'], verse_data['verse'], verse_data['text'].strip()
+            
+            print(f"✅ {book['name']} - {len(book_data['chapters'])} capítulos")
+
 def import_bible_data():
     """Importa os dados bíblicos do arquivo JSON"""
     json_path = Path(__file__).parent.parent.parent / "PorBLivre.json"
@@ -155,64 +144,21 @@ def import_bible_data():
     
     print(f"📖 Carregando dados de {json_path}...")
     
-    with open(json_path, 'r', encoding='utf-8') as f:
-        bible_data = json.load(f)
-    
+    # Carga em uma única transação, sem journal e sem fsync, lendo o JSON um
+    # livro por vez; os índices e o índice de busca (FTS5) são criados no final
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Limpar dados existentes
-    cursor.execute('DELETE FROM verses')
-    cursor.execute('DELETE FROM chapters')
-    cursor.execute('DELETE FROM books')
-    
-    print("🗑️ Dados antigos removidos")
-    
-    book_order = 1
-    total_books = len(bible_data['books'])
-    total_verses = 0
-    
-    for book_data in bible_data['books']:
-        book_name_en = book_data['name']
-        book_name_pt = translate_book_name(book_name_en)
-        testament = get_testament(book_name_en)
-        chapters_count = len(book_data['chapters'])
-        
-        # Inserir livro
-        cursor.execute('''
-            INSERT INTO books (name, testament, book_order, chapters_count)
-            VALUES (?, ?, ?, ?)
-        ''', (book_name_pt, testament, book_order, chapters_count))
-        
-        book_id = cursor.lastrowid
+    try:
+        with import_pragmas(conn):
+            rows, elapsed = load_scripture(conn, iter_bible_verses(json_path), 'PorBLivre')
+            conn.commit()
         
-        for chapter_data in book_data['chapters']:
-            chapter_number = chapter_data['chapter']
-            verses_count = len(chapter_data['verses'])
-            
-            # Inserir capítulo
-            cursor.execute('''
-                INSERT INTO chapters (book_id, chapter_number, verses_count)
-                VALUES (?, ?, ?)
-            ''', (book_id, chapter_number, verses_count))
-            
-            # Inserir versículos
-            for verse_data in chapter_data['verses']:
-                verse_number = verse_data['verse']
-                text = verse_data['text'].strip()
-                
-                cursor.execute('''
-                    INSERT INTO verses (book_id, chapter_number, verse_number, text, version)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (book_id, chapter_number, verse_number, text, 'PorBLivre'))
-                
-                total_verses += 1
-        
-        print(f"✅ {book_name_pt} ({book_order}/{total_books}) - {chapters_count} capítulos")
-        book_order += 1
+        total_books, total_verses = conn.execute(
+            'SELECT (SELECT COUNT(*) FROM books), (SELECT COUNT(*) FROM verses)'
+        ).fetchone()
+    finally:
+        conn.close()
     
-    conn.commit()
-    conn.close()
+    print(f"⚡ {format_rate(rows, elapsed)}")
     
     print(f"\n🎉 Importação concluída!")
     print(f"📚 {total_books} livros importados")
@@ -3,47 +3,23 @@
 Script para importar dados completos da Bíblia NVI para o banco de dados SQLite
 """
 
-import json
 import sqlite3
 import os
+import sys
 from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.bulk_import import import_pragmas, load_scripture, format_rate
+from src.services.json_stream import iter_json_array
+from src.services.schema import create_scripture_schema, has_legacy_verses
+from src.services.scripture_sync import sync_scripture
 
 def create_database_schema(cursor):
     """Criar tabelas do banco de dados"""
     
-    # Tabela de livros
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            abbrev TEXT NOT NULL,
-            testament TEXT NOT NULL,
-            order_num INTEGER NOT NULL
-        )
-    ''')
-    
-    # Tabela de capítulos
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chapters (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER NOT NULL,
-            chapter_num INTEGER NOT NULL,
-            verse_count INTEGER NOT NULL,
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
-    
-    # Tabela de versículos
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS verses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER NOT NULL,
-            chapter_num INTEGER NOT NULL,
-            verse_num INTEGER NOT NULL,
-            text TEXT NOT NULL,
-            FOREIGN KEY (book_id) REFERENCES books (id)
-        )
-    ''')
+    # Tabelas de livros, capítulos e versículos (chave BBCCCVVV);
+    # os índices são criados depois da carga, em load_scripture
+    create_scripture_schema(cursor)
     
     # Tabela de anotações
     cursor.execute('''
@@ -132,86 +108,88 @@ def get_book_info():
     ]
     return {book["abbrev"]: book for book in books_info}
 
-def import_bible_data(json_file_path, db_path):
-    """Importar dados da Bíblia do arquivo JSON para o banco SQLite"""
+def iter_bible_verses(json_file_path, books_info):
+    """
+    Ler o arquivo JSON livro a livro e gerar tuplas
+    (livro, capítulo, versículo, texto) para load_scripture
+    """
+    with open(json_file_path, 'r', encoding='utf-8-sig') as f:
+        for book_data in iter_json_array(f):
+            abbrev = book_data['abbrev']
+            if abbrev not in books_info:
+                print(f"Aviso: Livro {abbrev} não encontrado na lista de livros conhecidos")
+                continue
+            
+            book_info = books_info[abbrev]
+            book = {
+                'order': book_info['order'],
+                'name': book_info['name'],
+                'testament': 'Antigo Testamento' if book_info['testament'] == 'old' else 'Novo Testamento'
+            }
+            
+            for chapter_num, verses in enumerate(book_data['chapters'], 1):
+                for verse_num, verse_text in enumerate(verses, 1):
+                    yield book, chapter_num, verse_num, verse_text
+
+def sync_bible_data(conn, json_file_path):
+    """Sincronizar com o JSON gravando só o que mudou; anotações e ids são preservados"""
+    print("Sincronizando livros da Bíblia...")
+    
+    # Recriar a tabela de versículos renumeraria os ids usados pelas anotações
+    cursor = conn.cursor()
+    if has_legacy_verses(cursor):
+        print("❌ Banco anterior à chave verse_key: execute a importação completa (sem --sync)")
+        sys.exit(1)
+    
+    create_database_schema(cursor)
+    stats = sync_scripture(conn, iter_bible_verses(json_file_path, get_book_info()), 'NVI')
+    conn.commit()
+    
+    print(f"🔄 {stats['inserted']} versículos inseridos, {stats['updated']} atualizados, "
+          f"{stats['deleted']} removidos; {stats['books_unchanged']} livros sem alterações "
+          f"({stats['seconds']:.2f}s)")
+
+def import_bible_data(json_file_path, db_path, sync=False):
+    """
+    Importar dados da Bíblia do arquivo JSON para o banco SQLite.
+    Com sync=True a importação é incremental (ver sync_bible_data).
+    """
     
     # Conectar ao banco de dados
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     try:
-        # Criar schema do banco
-        create_database_schema(cursor)
-        
-        # Limpar dados existentes
-        cursor.execute('DELETE FROM annotations')
-        cursor.execute('DELETE FROM verses')
-        cursor.execute('DELETE FROM chapters')
-        cursor.execute('DELETE FROM books')
-        
-        # Carregar dados do JSON
-        with open(json_file_path, 'r', encoding='utf-8-sig') as f:
-            bible_data = json.load(f)
+        if sync:
+            sync_bible_data(conn, json_file_path)
+            return
         
-        # Obter informações dos livros
-        books_info = get_book_info()
+        print("Importando livros da Bíblia...")
         
-        print(f"Importando {len(bible_data)} livros da Bíblia...")
-        
-        for book_data in bible_data:
-            abbrev = book_data['abbrev']
-            chapters = book_data['chapters']
+        # Carga em uma única transação, sem journal e sem fsync, lendo o
+        # JSON um livro por vez
+        with import_pragmas(conn):
+            create_database_schema(cursor)
+            cursor.execute('DELETE FROM annotations')
             
-            # Obter informações do livro
-            if abbrev not in books_info:
-                print(f"Aviso: Livro {abbrev} não encontrado na lista de livros conhecidos")
-                continue
-                
-            book_info = books_info[abbrev]
-            
-            # Inserir livro
-            cursor.execute('''
-                INSERT INTO books (name, abbrev, testament, order_num)
-                VALUES (?, ?, ?, ?)
-            ''', (book_info['name'], abbrev, book_info['testament'], book_info['order']))
+            # Livros, capítulos, versículos, índices e índice de busca (FTS5)
+            verses = iter_bible_verses(json_file_path, get_book_info())
+            rows, elapsed = load_scripture(conn, verses, 'NVI')
             
-            book_id = cursor.lastrowid
+            # Inserir algumas anotações de exemplo
+            cursor.executemany('''
+                INSERT INTO annotations (verse_id, color, note)
+                VALUES (?, ?, ?)
+            ''', [
+                (3, 'yellow', 'Primeira menção da luz na criação'),
+                (4, 'blue', 'Deus viu que a luz era boa'),
+                (27, 'green', 'Criação do homem à imagem de Deus')
+            ])
             
-            print(f"Importando {book_info['name']} ({len(chapters)} capítulos)...")
-            
-            # Inserir capítulos e versículos
-            for chapter_num, verses in enumerate(chapters, 1):
-                # Inserir capítulo
-                cursor.execute('''
-                    INSERT INTO chapters (book_id, chapter_num, verse_count)
-                    VALUES (?, ?, ?)
-                ''', (book_id, chapter_num, len(verses)))
-                
-                # Inserir versículos
-                for verse_num, verse_text in enumerate(verses, 1):
-                    cursor.execute('''
-                        INSERT INTO verses (book_id, chapter_num, verse_num, text)
-                        VALUES (?, ?, ?, ?)
-                    ''', (book_id, chapter_num, verse_num, verse_text))
-        
-        # Inserir algumas anotações de exemplo
-        cursor.execute('''
-            INSERT INTO annotations (verse_id, color, note)
-            VALUES (3, 'yellow', 'Primeira menção da luz na criação')
-        ''')
-        
-        cursor.execute('''
-            INSERT INTO annotations (verse_id, color, note)
-            VALUES (4, 'blue', 'Deus viu que a luz era boa')
-        ''')
-        
-        cursor.execute('''
-            INSERT INTO annotations (verse_id, color, note)
-            VALUES (27, 'green', 'Criação do homem à imagem de Deus')
-        ''')
+            # Confirmar transação
+            conn.commit()
         
-        # Confirmar transação
-        conn.commit()
+        print(f"⚡ {format_rate(rows, elapsed)}")
         
         # Mostrar estatísticas
         cursor.execute('SELECT COUNT(*) FROM books')
@@ -254,7 +232,8 @@ def main():
         print(f"❌ Arquivo JSON não encontrado: {json_file}")
         return
     
-    import_bible_data(str(json_file), str(db_file))
+    # --sync: importação incremental, preservando as anotações
+    import_bible_data(str(json_file), str(db_file), sync='--sync' in sys.argv[1:])
 
 if __name__ == '__main__':
     main()
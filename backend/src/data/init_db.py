@@ -6,6 +6,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.models.bible import db, Book, Chapter, Verse, Annotation
+from src.services.verse_key import make_verse_key
 from src.data.bible_data import BIBLE_BOOKS, GENESIS_1_VERSES, JOHN_3_VERSES, PSALM_23_VERSES
 
 def init_database(app):
@@ -59,6 +60,7 @@ def init_database(app):
                     verse = Verse(
                         chapter_id=chapter.id,
                         number=verse_data['number'],
+                        verse_key=make_verse_key(book.order, chapter_num, verse_data['number']),
                         text=verse_data['text'],
                         version='NVI'
                     )
@@ -89,6 +91,7 @@ def init_database(app):
         if genesis_verse_3:
             annotation1 = Annotation(
                 verse_id=genesis_verse_3.id,
+                verse_key=genesis_verse_3.verse_key,
                 type='highlight',
                 color='#FFF3CD',
                 note_text='Deus cria pela sua palavra'
@@ -98,6 +101,7 @@ def init_database(app):
         if genesis_verse_4:
             annotation2 = Annotation(
                 verse_id=genesis_verse_4.id,
+                verse_key=genesis_verse_4.verse_key,
                 type='highlight',
                 color='#FFF3CD'
             )
@@ -106,6 +110,7 @@ def init_database(app):
         if john_verse_16:
             annotation3 = Annotation(
                 verse_id=john_verse_16.id,
+                verse_key=john_verse_16.verse_key,
                 type='highlight',
                 color='#D4EDDA',
                 note_text='O amor de Deus demonstrado'
@@ -1,14 +1,16 @@
 import os
+import sqlite3
 import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from src.models.bible import db
+from src.models.bible import db, upgrade_schema
 from src.routes.bible import bible_bp
 from src.routes.annotations import annotations_bp
 from src.routes.search import search_bp
+from src.services.corpus import load_corpus
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'bible-be-secret-key-2025'
@@ -29,6 +31,17 @@ db.init_app(app)
 # Initialize database
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+    # With gunicorn's preload_app this runs in the master: close the pooled
+    # connection so forked workers do not inherit an open SQLite handle
+    db.engine.dispose()
+
+# Load the scripture corpus at import time so that, with gunicorn's
+# preload_app, it is built once in the master and shared by all workers
+try:
+    load_corpus()
+except sqlite3.Error as e:
+    app.logger.warning(f'Scripture corpus not preloaded, will load on first use: {e}')
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
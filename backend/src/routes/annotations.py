@@ -1,18 +1,36 @@
 from flask import Blueprint, jsonify, request
-from src.models.bible import db, Annotation, Verse, Chapter, Book
+from src.models.bible import db, Annotation, AnnotationTombstone, Verse, Chapter, Book
+from src.services.annotation_stats import read_annotation_stats
+from src.services.corpus import get_corpus
+from src.services.response_cache import (
+    ANNOTATIONS_TAG, ANNOTATIONS_TTL, chapter_tag, invalidate_annotation, response_cached
+)
+from src.services.pagination import (
+    split_page, clamp_limit, encode_cursor, decode_cursor, encode_newest_first_cursor, apply_newest_first_cursor
+)
+from src.services.verse_key import chapter_key_range
 from datetime import datetime
 
 annotations_bp = Blueprint('annotations', __name__)
 
+# Valid annotation types; in chapter overlays, type i is flag bit (1 << i)
+ANNOTATION_TYPES = ['highlight', 'note', 'bookmark']
+
+def overlay_cache_tags(book_id, chapter_num):
+    """Response cache tags of a chapter overlay: only writes in that chapter invalidate it"""
+    book = get_corpus().get_book(book_id)
+    return [chapter_tag(book['order'], chapter_num)] if book else []
+
 @annotations_bp.route('/annotations', methods=['GET'])
 def get_annotations():
-    """Get all annotations with optional filtering"""
+    """Get all annotations with optional filtering (keyset-paginated via 'cursor')"""
     try:
         # Query parameters
         annotation_type = request.args.get('type')  # 'highlight', 'note', 'bookmark'
         book_id = request.args.get('book_id', type=int)
-        limit = request.args.get('limit', 100, type=int)
+        limit = clamp_limit(request.args.get('limit', 100, type=int))
         offset = request.args.get('offset', 0, type=int)
+        page_cursor = request.args.get('cursor')  # 'next_cursor' of the previous page
         
         # Build query
         query = Annotation.query.join(Verse).join(Chapter).join(Book)
@@ -24,14 +42,27 @@ def get_annotations():
         if book_id:
             query = query.filter(Book.id == book_id)
         
-        # Order by creation date (newest first)
-        query = query.order_by(Annotation.created_at.desc())
+        # Get total count (first page only; cursor pages seek past the last row instead)
+        total = None
+        if page_cursor:
+            try:
+                query = apply_newest_first_cursor(query, Annotation, page_cursor)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+            offset = 0
+        else:
+            total = query.count()
         
-        # Get total count
-        total = query.count()
+        # Order by creation date (newest first); verse, chapter and book come
+        # from the joins above, so serializing the page needs no further queries
+        query = query.options(Annotation.eager_options(joined=True))\
+                     .order_by(Annotation.created_at.desc(), Annotation.id.desc())
         
         # Apply pagination
-        annotations = query.offset(offset).limit(limit).all()
+        annotations, has_more = split_page(query.offset(offset).limit(limit + 1).all(), limit)
         
         return jsonify({
             'success': True,
@@ -40,7 +71,8 @@ def get_annotations():
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'has_more': offset + limit < total
+                'has_more': has_more,
+                'next_cursor': encode_newest_first_cursor(annotations[-1]) if has_more else None
             }
         }), 200
         
@@ -72,16 +104,16 @@ def create_annotation():
             }), 404
         
         # Validate annotation type
-        valid_types = ['highlight', 'note', 'bookmark']
-        if data['type'] not in valid_types:
+        if data['type'] not in ANNOTATION_TYPES:
             return jsonify({
                 'success': False,
-                'error': f'Invalid type. Must be one of: {", ".join(valid_types)}'
+                'error': f'Invalid type. Must be one of: {", ".join(ANNOTATION_TYPES)}'
             }), 400
         
         # Create annotation
         annotation = Annotation(
             verse_id=data['verse_id'],
+            verse_key=verse.verse_key,
             type=data['type'],
             color=data.get('color'),
             note_text=data.get('note_text')
@@ -89,6 +121,7 @@ def create_annotation():
         
         db.session.add(annotation)
         db.session.commit()
+        invalidate_annotation(verse.verse_key)
         
         return jsonify({
             'success': True,
@@ -103,6 +136,62 @@ def create_annotation():
             'error': str(e)
         }), 500
 
+def _decode_changes_token(token):
+    """Change sequence number a changes token was issued at (0 = from the start)"""
+    if not token:
+        return 0
+    
+    change_seq, = decode_cursor(token, (int,))
+    return change_seq
+
+@annotations_bp.route('/annotations/changes', methods=['GET'])
+def get_annotation_changes():
+    """
+    Annotations created, updated or deleted since 'since' (the 'next_token'
+    of a previous call; omit it for a full initial sync). Changes and
+    tombstones share one sequence assigned at commit time (see
+    services/annotation_changes.py) and are paged together in that order,
+    at most 'limit' rows in all. Clients apply 'deleted' before 'changed' and
+    keep calling while has_more.
+    """
+    try:
+        limit = clamp_limit(request.args.get('limit', 100, type=int))
+        
+        try:
+            since = _decode_changes_token(request.args.get('since'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid token'
+            }), 400
+        
+        # limit + 1 rows from each side always cover the first limit + 1 of both
+        changed = Annotation.query.options(Annotation.eager_options())\
+                                  .filter(Annotation.change_seq > since)\
+                                  .order_by(Annotation.change_seq).limit(limit + 1).all()
+        deleted = AnnotationTombstone.query.filter(AnnotationTombstone.change_seq > since)\
+                                           .order_by(AnnotationTombstone.change_seq).limit(limit + 1).all()
+        rows, has_more = split_page(sorted(changed + deleted, key=lambda row: row.change_seq), limit)
+        
+        # Advance the watermark past the last row returned
+        next_token = encode_cursor([rows[-1].change_seq if rows else since])
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'changed': [row.to_dict() for row in rows if isinstance(row, Annotation)],
+                'deleted': [row.to_dict() for row in rows if isinstance(row, AnnotationTombstone)],
+                'has_more': has_more,
+                'next_token': next_token
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @annotations_bp.route('/annotations/<int:annotation_id>', methods=['GET'])
 def get_annotation(annotation_id):
     """Get a specific annotation"""
@@ -135,11 +224,10 @@ def update_annotation(annotation_id):
         
         # Update fields
         if 'type' in data:
-            valid_types = ['highlight', 'note', 'bookmark']
-            if data['type'] not in valid_types:
+            if data['type'] not in ANNOTATION_TYPES:
                 return jsonify({
                     'success': False,
-                    'error': f'Invalid type. Must be one of: {", ".join(valid_types)}'
+                    'error': f'Invalid type. Must be one of: {", ".join(ANNOTATION_TYPES)}'
                 }), 400
             annotation.type = data['type']
         
@@ -152,6 +240,7 @@ def update_annotation(annotation_id):
         annotation.updated_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_annotation(annotation.verse_key)
         
         return jsonify({
             'success': True,
@@ -172,8 +261,11 @@ def delete_annotation(annotation_id):
     try:
         annotation = Annotation.query.get_or_404(annotation_id)
         
+        # A trigger leaves the tombstone /annotations/changes reports
+        verse_key = annotation.verse_key
         db.session.delete(annotation)
         db.session.commit()
+        invalidate_annotation(verse_key)
         
         return jsonify({
             'success': True,
@@ -194,7 +286,9 @@ def get_verse_annotations(verse_id):
         # Validate verse exists
         verse = Verse.query.get_or_404(verse_id)
         
-        annotations = Annotation.query.filter_by(verse_id=verse_id).order_by(Annotation.created_at.desc()).all()
+        annotations = Annotation.query.options(Annotation.eager_options())\
+                                      .filter_by(verse_id=verse_id)\
+                                      .order_by(Annotation.created_at.desc()).all()
         
         return jsonify({
             'success': True,
@@ -210,22 +304,95 @@ def get_verse_annotations(verse_id):
             'error': str(e)
         }), 500
 
+@annotations_bp.route('/books/<int:book_id>/chapters/<int:chapter_num>/annotations', methods=['GET'])
+@response_cached(ANNOTATIONS_TTL, overlay_cache_tags)
+def get_chapter_annotation_overlay(book_id, chapter_num):
+    """
+    Compact annotation overlay for rendering a chapter. Position i of 'flags'
+    and 'colors' describes verse i + 1: 'flags' is a bitmask over 'types',
+    'colors' is a 1-based index into 'palette' (0 = no colour). Read with one
+    range scan over the annotations' verse_key index.
+    """
+    try:
+        corpus = get_corpus()
+        
+        book = corpus.get_book(book_id)
+        if not book:
+            return jsonify({
+                'success': False,
+                'error': 'Book not found'
+            }), 404
+        
+        last_verse = corpus.chapter_last_verse(book_id, chapter_num)
+        if last_verse is None:
+            return jsonify({
+                'success': False,
+                'error': 'Chapter not found'
+            }), 404
+        
+        first_key, last_key = chapter_key_range(book['order'], chapter_num)
+        rows = db.session.query(Annotation.verse_key, Annotation.type, Annotation.color)\
+                         .filter(Annotation.verse_key.between(first_key, last_key))\
+                         .order_by(Annotation.verse_key, Annotation.created_at, Annotation.id)\
+                         .all()
+        
+        flags = [0] * last_verse
+        colors = [0] * last_verse
+        palette = {}
+        for verse_key, annotation_type, color in rows:
+            position = verse_key - first_key - 1
+            if not 0 <= position < last_verse or annotation_type not in ANNOTATION_TYPES:
+                continue
+            flags[position] |= 1 << ANNOTATION_TYPES.index(annotation_type)
+            if color:
+                # Latest coloured annotation wins
+                colors[position] = palette.setdefault(color, len(palette) + 1)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'book_id': book_id,
+                'chapter': chapter_num,
+                'types': ANNOTATION_TYPES,
+                'palette': list(palette),
+                'flags': flags,
+                'colors': colors
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @annotations_bp.route('/annotations/stats', methods=['GET'])
+@response_cached(ANNOTATIONS_TTL, [ANNOTATIONS_TAG])
 def get_annotation_stats():
     """Get annotation statistics"""
     try:
-        total_annotations = Annotation.query.count()
-        highlights = Annotation.query.filter_by(type='highlight').count()
-        notes = Annotation.query.filter_by(type='note').count()
-        bookmarks = Annotation.query.filter_by(type='bookmark').count()
+        # Counters kept up to date by triggers (see services/annotation_stats.py)
+        counts = read_annotation_stats(db.session)
+        
+        by_type = {annotation_type: 0 for annotation_type in ANNOTATION_TYPES}
+        by_book = {}
+        for (book_id, annotation_type), count in counts.items():
+            by_type[annotation_type] = by_type.get(annotation_type, 0) + count
+            if book_id:
+                by_book[book_id] = by_book.get(book_id, 0) + count
+        total_annotations = sum(by_type.values())
+        highlights = by_type['highlight']
+        notes = by_type['note']
+        bookmarks = by_type['bookmark']
         
         # Get most annotated books
-        most_annotated = db.session.query(
-            Book.name,
-            db.func.count(Annotation.id).label('annotation_count')
-        ).join(Chapter).join(Verse).join(Annotation).group_by(Book.id, Book.name).order_by(
-            db.func.count(Annotation.id).desc()
-        ).limit(5).all()
+        top_books = sorted(by_book.items(), key=lambda item: (-item[1], item[0]))[:5]
+        book_names = dict(
+            db.session.query(Book.id, Book.name).filter(Book.id.in_([book_id for book_id, _ in top_books]))
+        ) if top_books else {}
+        most_annotated = [
+            (book_names[book_id], count) for book_id, count in top_books if book_id in book_names
+        ]
         
         return jsonify({
             'success': True,
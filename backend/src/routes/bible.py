@@ -1,50 +1,39 @@
 from flask import Blueprint, jsonify, request
-import sqlite3
-from pathlib import Path
+from src.services.database import release_db_connection
+from src.services.corpus import get_corpus
+from src.services.http_cache import corpus_cached, negotiate_encoding
+from src.services.chapter_blobs import CHAPTER_ENCODINGS, get_chapter_blobs, blob_response
+from src.services.references import resolve_reference
 
 bible_bp = Blueprint('bible', __name__)
 
-def get_db_connection():
-    """Get database connection"""
-    db_path = Path(__file__).parent.parent / "bible.db"
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Items (ids or references) accepted by one POST /verses/batch request
+MAX_BATCH_ITEMS = 500
+# Verses one batch may resolve to in total ('Sl 1-150' alone is ~2,500)
+MAX_BATCH_VERSES = 5000
+
+# Pooled scripture connections (used by the search routes) are returned
+# to the pool on teardown
+bible_bp.teardown_app_request(release_db_connection)
 
 @bible_bp.route('/books', methods=['GET'])
+@corpus_cached
 def get_books():
-    """Get all Bible books"""
+    """Get all Bible books (served from the in-memory corpus)"""
     try:
         testament = request.args.get('testament')  # 'Antigo Testamento', 'Novo Testamento', or None for all
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if testament:
-            cursor.execute('''
-                SELECT id, name, testament, book_order, chapters_count 
-                FROM books 
-                WHERE testament = ?
-                ORDER BY book_order
-            ''', (testament,))
-        else:
-            cursor.execute('''
-                SELECT id, name, testament, book_order, chapters_count 
-                FROM books 
-                ORDER BY book_order
-            ''')
-        
-        books = []
-        for row in cursor.fetchall():
-            books.append({
-                'id': row['id'],
-                'name': row['name'],
-                'testament': row['testament'],
-                'order': row['book_order'],
-                'chapters_count': row['chapters_count']
-            })
-        
-        conn.close()
+        books = [
+            {
+                'id': book['id'],
+                'name': book['name'],
+                'testament': book['testament'],
+                'order': book['order'],
+                'chapters_count': book['chapters_count']
+            }
+            for book in get_corpus().books
+            if not testament or book['testament'] == testament
+        ]
         
         return jsonify({
             'success': True,
@@ -59,21 +48,12 @@ def get_books():
         }), 500
 
 @bible_bp.route('/books/<int:book_id>', methods=['GET'])
+@corpus_cached
 def get_book(book_id):
-    """Get specific book details"""
+    """Get specific book details (served from the in-memory corpus)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, testament, book_order, chapters_count 
-            FROM books 
-            WHERE id = ?
-        ''', (book_id,))
-        
-        book = cursor.fetchone()
+        book = get_corpus().get_book(book_id)
         if not book:
-            conn.close()
             return jsonify({
                 'success': False,
                 'error': 'Book not found'
@@ -83,12 +63,10 @@ def get_book(book_id):
             'id': book['id'],
             'name': book['name'],
             'testament': book['testament'],
-            'order': book['book_order'],
+            'order': book['order'],
             'chapters_count': book['chapters_count']
         }
         
-        conn.close()
-        
         return jsonify({
             'success': True,
             'data': book_data
@@ -101,66 +79,50 @@ def get_book(book_id):
         }), 500
 
 @bible_bp.route('/books/<int:book_id>/chapters/<int:chapter_num>', methods=['GET'])
+@corpus_cached(encodings=CHAPTER_ENCODINGS)
 def get_chapter(book_id, chapter_num):
-    """Get specific chapter with all verses"""
+    """Get specific chapter with all verses (pre-rendered, pre-compressed bytes)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        corpus = get_corpus()
         
         # Get book info
-        cursor.execute('''
-            SELECT id, name, testament, book_order, chapters_count 
-            FROM books 
-            WHERE id = ?
-        ''', (book_id,))
-        
-        book = cursor.fetchone()
-        if not book:
-            conn.close()
+        if not corpus.get_book(book_id):
             return jsonify({
                 'success': False,
                 'error': 'Book not found'
             }), 404
         
-        # Get verses for the chapter
-        cursor.execute('''
-            SELECT verse_number, text 
-            FROM verses 
-            WHERE book_id = ? AND chapter_number = ?
-            ORDER BY verse_number
-        ''', (book_id, chapter_num))
-        
-        verses = []
-        for row in cursor.fetchall():
-            verses.append({
-                'number': row['verse_number'],
-                'text': row['text']
-            })
-        
-        if not verses:
-            conn.close()
+        # Rendered JSON plus its compressed encodings, built on first request
+        blob = get_chapter_blobs(corpus).get(book_id, chapter_num)
+        if not blob:
             return jsonify({
                 'success': False,
                 'error': 'Chapter not found'
             }), 404
         
-        # Get navigation info (previous/next chapter)
-        navigation = get_navigation_info(cursor, book_id, chapter_num)
+        return blob_response(blob, negotiate_encoding(CHAPTER_ENCODINGS))
         
-        conn.close()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bible_bp.route('/verses/<int:verse_id>', methods=['GET'])
+@corpus_cached
+def get_verse(verse_id):
+    """Get specific verse (served from the in-memory corpus)"""
+    try:
+        verse_data = get_corpus().get_verse(verse_id)
+        if not verse_data:
+            return jsonify({
+                'success': False,
+                'error': 'Verse not found'
+            }), 404
         
         return jsonify({
             'success': True,
-            'data': {
-                'book': {
-                    'id': book['id'],
-                    'name': book['name'],
-                    'testament': book['testament']
-                },
-                'chapter': chapter_num,
-                'verses': verses,
-                'navigation': navigation
-            }
+            'data': verse_data
         }), 200
         
     except Exception as e:
@@ -169,48 +131,67 @@ def get_chapter(book_id, chapter_num):
             'error': str(e)
         }), 500
 
-@bible_bp.route('/verses/<int:verse_id>', methods=['GET'])
-def get_verse(verse_id):
-    """Get specific verse"""
+@bible_bp.route('/verses/batch', methods=['POST'])
+def get_verses_batch():
+    """
+    Get many verses at once: {"verses": [1234, "João 3:16-18", ...]}
+    Integers are verse ids (as in /verses/<id>, not BBCCCVVV verse keys),
+    strings are references. Results come back in input order; an item that
+    does not resolve gets an empty 'verses' list.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT v.id, v.book_id, v.chapter_number, v.verse_number, v.text, v.version,
-                   b.name as book_name, b.testament
-            FROM verses v
-            JOIN books b ON v.book_id = b.id
-            WHERE v.id = ?
-        ''', (verse_id,))
+        body = request.get_json(silent=True)
+        items = body.get('verses') if isinstance(body, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be {"verses": [id or reference, ...]}'
+            }), 400
         
-        verse = cursor.fetchone()
-        if not verse:
-            conn.close()
+        if len(items) > MAX_BATCH_ITEMS:
             return jsonify({
                 'success': False,
-                'error': 'Verse not found'
-            }), 404
+                'error': f'At most {MAX_BATCH_ITEMS} ids or references per batch'
+            }), 400
         
-        verse_data = {
-            'id': verse['id'],
-            'book': {
-                'id': verse['book_id'],
-                'name': verse['book_name'],
-                'testament': verse['testament']
-            },
-            'chapter': verse['chapter_number'],
-            'verse': verse['verse_number'],
-            'text': verse['text'],
-            'version': verse['version'],
-            'reference': f"{verse['book_name']} {verse['chapter_number']}:{verse['verse_number']}"
-        }
+        # bool is an int subclass, but true/false are not verse ids
+        invalid = [item for item in items
+                   if isinstance(item, bool) or not isinstance(item, (int, str))]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid verse id or reference: {invalid[0]!r}'
+            }), 400
         
-        conn.close()
+        # Every lookup is an in-memory binary search on the corpus
+        corpus = get_corpus()
+        results = []
+        count = 0
+        for item in items:
+            if isinstance(item, int):
+                verse = corpus.get_verse(item)
+                verses = [verse] if verse else []
+            else:
+                # One verse past the cap is enough to reject the batch
+                verses = resolve_reference(corpus, item, MAX_BATCH_VERSES - count + 1)
+            
+            # Stop as soon as the total is exceeded
+            count += len(verses)
+            if count > MAX_BATCH_VERSES:
+                return jsonify({
+                    'success': False,
+                    'error': f'Batch resolves to more than {MAX_BATCH_VERSES} verses'
+                }), 400
+            
+            results.append({
+                'query': item,
+                'verses': verses
+            })
         
         return jsonify({
             'success': True,
-            'data': verse_data
+            'data': results,
+            'count': count
         }), 200
         
     except Exception as e:
@@ -220,14 +201,19 @@ def get_verse(verse_id):
         }), 500
 
 @bible_bp.route('/navigation/<int:book_id>/<int:chapter_num>', methods=['GET'])
+@corpus_cached
 def get_navigation(book_id, chapter_num):
-    """Get navigation information for a chapter"""
+    """Get navigation information for a chapter (served from the in-memory corpus)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        corpus = get_corpus()
         
-        navigation = get_navigation_info(cursor, book_id, chapter_num)
-        conn.close()
+        if corpus.chapter_ordinal(book_id, chapter_num) is None:
+            return jsonify({
+                'success': False,
+                'error': 'Chapter not found'
+            }), 404
+        
+        navigation = corpus.get_navigation(book_id, chapter_num)
         
         return jsonify({
             'success': True,
@@ -240,63 +226,57 @@ def get_navigation(book_id, chapter_num):
             'error': str(e)
         }), 500
 
-def get_navigation_info(cursor, book_id, chapter_num):
-    """Helper function to get navigation information"""
-    navigation = {
-        'previous': None,
-        'next': None
-    }
-    
-    # Get current book info
-    cursor.execute('SELECT chapters_count FROM books WHERE id = ?', (book_id,))
-    book = cursor.fetchone()
-    
-    if not book:
-        return navigation
-    
-    chapters_count = book['chapters_count']
-    
-    # Previous chapter
-    if chapter_num > 1:
-        navigation['previous'] = {
-            'book_id': book_id,
-            'chapter': chapter_num - 1
-        }
-    else:
-        # Previous book's last chapter
-        cursor.execute('''
-            SELECT id, chapters_count, name
-            FROM books 
-            WHERE book_order = (SELECT book_order - 1 FROM books WHERE id = ?)
-        ''', (book_id,))
-        prev_book = cursor.fetchone()
-        if prev_book:
-            navigation['previous'] = {
-                'book_id': prev_book['id'],
-                'chapter': prev_book['chapters_count'],
-                'book_name': prev_book['name']
-            }
-    
-    # Next chapter
-    if chapter_num < chapters_count:
-        navigation['next'] = {
-            'book_id': book_id,
-            'chapter': chapter_num + 1
-        }
-    else:
-        # Next book's first chapter
-        cursor.execute('''
-            SELECT id, name
-            FROM books 
-            WHERE book_order = (SELECT book_order + 1 FROM books WHERE id = ?)
-        ''', (book_id,))
-        next_book = cursor.fetchone()
-        if next_book:
-            navigation['next'] = {
-                'book_id': next_book['id'],
-                'chapter': 1,
-                'book_name': next_book['name']
-            }
-    
-    return navigation
+@bible_bp.route('/navigation/<int:book_id>/<int:chapter_num>/jump/<int(signed=True):count>', methods=['GET'])
+@corpus_cached
+def jump_chapters(book_id, chapter_num, count):
+    """Get the chapter `count` chapters before (negative) or after a chapter"""
+    try:
+        corpus = get_corpus()
+        
+        ordinal = corpus.chapter_ordinal(book_id, chapter_num)
+        if ordinal is None:
+            return jsonify({
+                'success': False,
+                'error': 'Chapter not found'
+            }), 404
+        
+        target = corpus.chapter_link(ordinal + count)
+        if not target:
+            return jsonify({
+                'success': False,
+                'error': 'Jump goes past the start or end of the Bible'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': target
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
+@bible_bp.route('/navigation/chapters/<int:ordinal>', methods=['GET'])
+@corpus_cached
+def get_chapter_by_ordinal(ordinal):
+    """Get the chapter at a position in the whole Bible (1 = Gênesis 1, 1189 = Apocalipse 22)"""
+    try:
+        target = get_corpus().chapter_link(ordinal - 1)
+        if not target:
+            return jsonify({
+                'success': False,
+                'error': 'Chapter not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': target
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
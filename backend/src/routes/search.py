@@ -1,54 +1,89 @@
 from flask import Blueprint, request, jsonify
 from ..models.bible import db, Book, Chapter, Verse, Annotation
-import re
-from sqlalchemy import or_, and_
+from ..services.search_index import (
+    FTS_TABLE, MATCH_OPEN, MATCH_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS,
+    build_match_query, extract_match_offsets
+)
+from ..services.pagination import (
+    encode_cursor, decode_cursor, split_page, clamp_limit,
+    encode_newest_first_cursor, apply_newest_first_cursor
+)
+from ..services.database import get_db_connection
+from ..services.book_names import book_abbreviation
+from ..services.corpus import get_corpus
+from ..services.query_planner import PLAN_REFERENCE, plan_query, describe_plan
+from ..services.references import parse_reference, reference_key_ranges, unresolved_book
+from ..services.response_cache import ANNOTATIONS_TAG, ANNOTATIONS_TTL, response_cached
+from ..services.suggestions import suggest
+from ..services.verse_key import split_verse_key
 
 search_bp = Blueprint('search', __name__)
 
-def parse_bible_reference(reference):
+# Sort keys for /search/verses, keyed by the 'sort' query param.
+# They are unique per verse, so they double as the keyset cursor; the packed
+# verse key (BBCCCVVV) gives canonical order in a single integer column.
+SEARCH_SORT_KEYS = {
+    'canonical': ['v.verse_key'],
+    'relevance': [f'bm25({FTS_TABLE})', 'v.verse_key']
+}
+# Cursor value types of each sort (bm25 scores are floats, verse keys ints)
+SEARCH_CURSOR_TYPES = {
+    'canonical': (int,),
+    'relevance': ((int, float), int)
+}
+
+def reference_response(reference, key_ranges, plan=None):
     """
-    Parse a Bible reference like 'João 3:16', 'Gênesis 1:1-3', 'Salmos 23'
-    Returns: (book_name, chapter, verse_start, verse_end)
+    Response for a reference resolved to verse_key ranges (see
+    services/references.reference_key_ranges). Verses come from the
+    in-memory corpus, so references are read from the same scripture
+    database as text search. `plan` is echoed back for diagnostics.
     """
-    reference = reference.strip()
-    
-    # Pattern for book chapter:verse or book chapter:verse-verse
-    pattern = r'^(.+?)\s+(\d+)(?::(\d+)(?:-(\d+))?)?$'
-    match = re.match(pattern, reference)
-    
-    if match:
-        book_name = match.group(1).strip()
-        chapter = int(match.group(2))
-        verse_start = int(match.group(3)) if match.group(3) else None
-        verse_end = int(match.group(4)) if match.group(4) else verse_start
-        
-        return book_name, chapter, verse_start, verse_end
+    corpus = get_corpus()
     
-    return None, None, None, None
-
-def find_book_by_name(book_name):
-    """Find book by name or abbreviation"""
-    # Try exact match first
-    book = Book.query.filter(
-        or_(
-            Book.name.ilike(book_name),
-            Book.abbreviation.ilike(book_name)
-        )
-    ).first()
+    # Regroup into passages (one per book and chapter) in input order
+    passages = []
+    current = None
+    for first, last in key_ranges:
+        for verse in corpus.get_key_range(first, last):
+            book_order, chapter_num, _ = split_verse_key(verse['key'])
+            if (book_order, chapter_num) != current:
+                current = (book_order, chapter_num)
+                passages.append({
+                    'book': dict(verse['book'], abbreviation=book_abbreviation(book_order)),
+                    'chapter': chapter_num,
+                    'verses': []
+                })
+            passages[-1]['verses'].append({
+                'id': verse['id'],
+                'verse_num': verse['verse'],
+                'text': verse['text']
+            })
     
-    if book:
-        return book
+    if not passages:
+        return jsonify({
+            'success': False,
+            'error': f'Referência "{reference}" não encontrada'
+        }), 404
     
-    # Try partial match
-    book = Book.query.filter(
-        Book.name.ilike(f'%{book_name}%')
-    ).first()
+    # Format response: the first passage at the top level, as for a simple reference
+    result = dict(passages[0])
+    result['passages'] = passages
+    result['ranges'] = [{'start': first, 'end': last} for first, last in key_ranges]
     
-    return book
+    response = {
+        'success': True,
+        'data': result,
+        'reference': reference
+    }
+    if plan:
+        response['plan'] = plan
+    return jsonify(response)
 
 @search_bp.route('/search/reference', methods=['GET'])
+@response_cached()
 def search_by_reference():
-    """Search for verses by Bible reference (e.g., 'João 3:16')"""
+    """Search for verses by Bible reference (e.g., 'João 3:16', 'Jo 3:16-18; 4:1-3', 'Rm 8:28-9:5')"""
     try:
         reference = request.args.get('ref', '').strip()
         
@@ -59,80 +94,28 @@ def search_by_reference():
             }), 400
         
         # Parse the reference
-        book_name, chapter_num, verse_start, verse_end = parse_bible_reference(reference)
+        ranges = parse_reference(reference)
         
-        if not book_name or not chapter_num:
+        if not ranges:
             return jsonify({
                 'success': False,
                 'error': 'Formato de referência inválido. Use: "Livro Capítulo:Versículo" (ex: João 3:16)'
             }), 400
         
-        # Find the book
-        book = find_book_by_name(book_name)
-        if not book:
-            return jsonify({
-                'success': False,
-                'error': f'Livro "{book_name}" não encontrado'
-            }), 404
-        
-        # Find the chapter
-        chapter = Chapter.query.filter(
-            and_(
-                Chapter.book_id == book.id,
-                Chapter.number == chapter_num
-            )
-        ).first()
-        
-        if not chapter:
-            return jsonify({
-                'success': False,
-                'error': f'Capítulo {chapter_num} não encontrado em {book.name}'
-            }), 404
-        
-        # Build query for verses
-        query = Verse.query.filter(Verse.chapter_id == chapter.id)
-        
-        # Add verse filter if specified
-        if verse_start:
-            if verse_end and verse_end != verse_start:
-                query = query.filter(
-                    and_(
-                        Verse.number >= verse_start,
-                        Verse.number <= verse_end
-                    )
-                )
-            else:
-                query = query.filter(Verse.number == verse_start)
-        
-        verses = query.order_by(Verse.number).all()
-        
-        if not verses:
+        key_ranges = reference_key_ranges(ranges)
+        if key_ranges is None:
+            book_name = unresolved_book(ranges)
+            if book_name:
+                return jsonify({
+                    'success': False,
+                    'error': f'Livro "{book_name}" não encontrado'
+                }), 404
             return jsonify({
                 'success': False,
                 'error': f'Referência "{reference}" não encontrada'
             }), 404
         
-        # Format response
-        result = {
-            'book': {
-                'id': book.id,
-                'name': book.name,
-                'abbreviation': book.abbreviation,
-                'testament': book.testament
-            },
-            'chapter': chapter_num,
-            'verses': [{
-                'id': verse.id,
-                'verse_num': verse.number,
-                'text': verse.text
-            } for verse in verses]
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result,
-            'reference': reference
-        })
+        return reference_response(reference, key_ranges)
         
     except Exception as e:
         return jsonify({
@@ -141,14 +124,35 @@ def search_by_reference():
         }), 500
 
 @search_bp.route('/search/verses', methods=['GET'])
+@response_cached()
 def search_verses():
-    """Search for verses by text content"""
+    """
+    Search for verses by text content (accent-insensitive, via the FTS5 index)
+    
+    Query params:
+        sort: 'canonical' (default, Bible order) or 'relevance' (BM25)
+        snippet: when truthy, return a trimmed 'snippet' instead of the full 'text'
+        cursor: 'next_cursor' of the previous page (keyset pagination); when
+                given, 'offset' is ignored and 'total' is not recomputed
+    Every result carries 'highlights': [start, end) character offsets of the
+    matched words inside 'text' (or 'snippet').
+    """
+    return text_search_response(request.args.get('q', '').strip())
+
+def text_search_response(query_text, key_ranges=(), plan=None):
+    """
+    Full-text search response for query_text, optionally restricted to
+    inclusive verse_key ranges; the remaining options come from the query
+    params (see search_verses). `plan` is echoed back for diagnostics.
+    """
     try:
-        query_text = request.args.get('q', '').strip()
         book_id = request.args.get('book_id', type=int)
         testament = request.args.get('testament')
-        limit = request.args.get('limit', 50, type=int)
+        limit = clamp_limit(request.args.get('limit', 50, type=int))
         offset = request.args.get('offset', 0, type=int)
+        sort = request.args.get('sort', 'canonical')
+        page_cursor = request.args.get('cursor')
+        use_snippet = request.args.get('snippet', '').lower() in ('1', 'true', 'yes')
         
         if not query_text:
             return jsonify({
@@ -156,53 +160,143 @@ def search_verses():
                 'error': 'Texto de busca não fornecido'
             }), 400
         
-        # Build query
-        query = db.session.query(Verse, Book).join(Book)
+        if sort not in SEARCH_SORT_KEYS:
+            return jsonify({
+                'success': False,
+                'error': f'Ordenação inválida. Use: {", ".join(SEARCH_SORT_KEYS)}'
+            }), 400
         
-        # Add text search
-        query = query.filter(Verse.text.ilike(f'%{query_text}%'))
+        sort_keys = SEARCH_SORT_KEYS[sort]
+        if page_cursor:
+            try:
+                after = decode_cursor(page_cursor, SEARCH_CURSOR_TYPES[sort])
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Cursor inválido'
+                }), 400
+        
+        match_query = build_match_query(query_text)
+        if not match_query:
+            return jsonify({
+                'success': False,
+                'error': 'Texto de busca inválido'
+            }), 400
+        
+        # Build query
+        conditions = [f'{FTS_TABLE} MATCH ?']
+        params = [match_query]
         
         # Add filters
         if book_id:
-            query = query.filter(Verse.book_id == book_id)
+            conditions.append('v.book_id = ?')
+            params.append(book_id)
         
         if testament:
-            query = query.filter(Book.testament == testament)
-        
-        # Get total count
-        total = query.count()
+            conditions.append('b.testament = ?')
+            params.append(testament)
+        
+        # verse_key is the rowid of verses, so each range is a rowid range
+        if key_ranges:
+            conditions.append('(' + ' OR '.join(['v.verse_key BETWEEN ? AND ?'] * len(key_ranges)) + ')')
+            for first, last in key_ranges:
+                params.extend([first, last])
+        
+        where_clause = ' AND '.join(conditions)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Get total count (first page only; cursor pages skip the extra scan)
+        total = None
+        if not page_cursor:
+            cursor.execute(f'''
+                SELECT COUNT(*)
+                FROM {FTS_TABLE} f
+                JOIN verses v ON v.id = f.rowid
+                JOIN books b ON b.id = v.book_id
+                WHERE {where_clause}
+            ''', params)
+            total = cursor.fetchone()[0]
+        
+        # Resume after the last row of the previous page instead of using OFFSET
+        if page_cursor:
+            placeholders = ', '.join('?' * len(sort_keys))
+            where_clause += f" AND ({', '.join(sort_keys)}) > ({placeholders})"
+            params = params + after
+            offset = 0
+        
+        # Matched text comes back with marker characters around each hit
+        if use_snippet:
+            marked_column = f"snippet({FTS_TABLE}, 0, ?, ?, ?, ?)"
+            marked_params = [MATCH_OPEN, MATCH_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS]
+        else:
+            marked_column = f"highlight({FTS_TABLE}, 0, ?, ?)"
+            marked_params = [MATCH_OPEN, MATCH_CLOSE]
         
         # Apply pagination and get results
-        results = query.order_by(Book.order_num, Verse.chapter_num, Verse.verse_num)\
-                      .offset(offset).limit(limit).all()
+        cursor.execute(f'''
+            SELECT v.id, v.verse_key, v.chapter_number, v.verse_number,
+                   {marked_column} AS marked_text,
+                   bm25({FTS_TABLE}) AS score,
+                   b.id AS book_id, b.name AS book_name, b.testament
+            FROM {FTS_TABLE} f
+            JOIN verses v ON v.id = f.rowid
+            JOIN books b ON b.id = v.book_id
+            WHERE {where_clause}
+            ORDER BY {', '.join(sort_keys)}
+            LIMIT ? OFFSET ?
+        ''', marked_params + params + [limit + 1, offset])
+        
+        rows, has_more = split_page(cursor.fetchall(), limit)
         
         # Format response
         verses = []
-        for verse, book in results:
-            verses.append({
-                'id': verse.id,
+        for row in rows:
+            text, highlights = extract_match_offsets(row['marked_text'])
+            verse = {
+                'id': row['id'],
+                'key': row['verse_key'],
                 'book': {
-                    'id': book.id,
-                    'name': book.name,
-                    'abbrev': book.abbrev,
-                    'testament': book.testament
+                    'id': row['book_id'],
+                    'name': row['book_name'],
+                    'testament': row['testament']
                 },
-                'chapter_num': verse.chapter_num,
-                'verse_num': verse.verse_num,
-                'text': verse.text,
-                'reference': f'{book.name} {verse.chapter_num}:{verse.verse_num}'
-            })
-        
-        return jsonify({
+                'chapter_num': row['chapter_number'],
+                'verse_num': row['verse_number'],
+                'reference': f"{row['book_name']} {row['chapter_number']}:{row['verse_number']}",
+                'highlights': highlights
+            }
+            verse['snippet' if use_snippet else 'text'] = text
+            if sort == 'relevance':
+                # bm25() is negative, lower is better; expose it as higher-is-better
+                verse['score'] = round(-row['score'], 4)
+            verses.append(verse)
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            key = [last['verse_key']]
+            if sort == 'relevance':
+                key.insert(0, last['score'])
+            next_cursor = encode_cursor(key)
+        
+        response = {
             'success': True,
             'data': {
                 'verses': verses,
                 'total': total,
                 'limit': limit,
                 'offset': offset,
-                'query': query_text
+                'has_more': has_more,
+                'next_cursor': next_cursor,
+                'query': query_text,
+                'sort': sort
             }
-        })
+        }
+        if plan:
+            response['plan'] = plan
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({
@@ -212,7 +306,7 @@ def search_verses():
 
 @search_bp.route('/search/suggestions', methods=['GET'])
 def search_suggestions():
-    """Get search suggestions for book names"""
+    """Get type-ahead suggestions for books, chapters and verses (e.g. 'Sl 11', 'Jo 3:1')"""
     try:
         query = request.args.get('q', '').strip()
         
@@ -222,20 +316,8 @@ def search_suggestions():
                 'data': []
             })
         
-        # Search books by name
-        books = Book.query.filter(
-            Book.name.ilike(f'%{query}%')
-        ).order_by(Book.order_num).limit(10).all()
-        
-        suggestions = []
-        for book in books:
-            suggestions.append({
-                'id': book.id,
-                'name': book.name,
-                'abbrev': book.abbrev,
-                'testament': book.testament,
-                'type': 'book'
-            })
+        # Completed from an in-memory trie and the corpus bounds, no SQL
+        suggestions = suggest(get_corpus(), query)
         
         return jsonify({
             'success': True,
@@ -249,8 +331,9 @@ def search_suggestions():
         }), 500
 
 @search_bp.route('/search/quick', methods=['GET'])
+@response_cached()
 def quick_search():
-    """Quick search that handles both references and text"""
+    """Quick search that handles references, text, and text within a book ('amor em 1 Coríntios')"""
     try:
         query = request.args.get('q', '').strip()
         
@@ -260,15 +343,13 @@ def quick_search():
                 'error': 'Consulta não fornecida'
             }), 400
         
-        # Try to parse as Bible reference first
-        book_name, chapter_num, verse_start, verse_end = parse_bible_reference(query)
+        # Classify the input once, then run only the chosen plan
+        plan = plan_query(query)
         
-        if book_name and chapter_num:
-            # It's a reference, redirect to reference search
-            return search_by_reference()
+        if plan['type'] == PLAN_REFERENCE:
+            return reference_response(query, plan['key_ranges'], describe_plan(plan))
         
-        # Otherwise, search by text
-        return search_verses()
+        return text_search_response(plan['text'], plan.get('key_ranges', ()), describe_plan(plan))
         
     except Exception as e:
         return jsonify({
@@ -277,59 +358,80 @@ def quick_search():
         }), 500
 
 @search_bp.route('/search/annotated', methods=['GET'])
+@response_cached(ANNOTATIONS_TTL, [ANNOTATIONS_TAG])
 def search_annotated_verses():
-    """Search verses that have annotations"""
+    """Search verses that have annotations (newest first, keyset-paginated via 'cursor')"""
     try:
-        limit = request.args.get('limit', 20, type=int)
+        limit = clamp_limit(request.args.get('limit', 20, type=int))
         offset = request.args.get('offset', 0, type=int)
         color = request.args.get('color')
+        page_cursor = request.args.get('cursor')
         
         # Build query for verses with annotations
-        query = db.session.query(Verse, Book, Annotation)\
-                         .join(Book)\
-                         .join(Annotation)
+        query = db.session.query(Verse, Chapter, Book, Annotation)\
+                         .join(Annotation.verse)\
+                         .join(Verse.chapter)\
+                         .join(Chapter.book)
         
         # Add color filter if specified
         if color:
             query = query.filter(Annotation.color == color)
         
-        # Get total count
-        total = query.count()
+        # Get total count (first page only)
+        total = None
+        if page_cursor:
+            try:
+                query = apply_newest_first_cursor(query, Annotation, page_cursor)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Cursor inválido'
+                }), 400
+            offset = 0
+        else:
+            total = query.count()
         
         # Apply pagination
-        results = query.order_by(Annotation.created_at.desc())\
-                      .offset(offset).limit(limit).all()
+        results = query.order_by(Annotation.created_at.desc(), Annotation.id.desc())\
+                      .offset(offset).limit(limit + 1).all()
+        results, has_more = split_page(results, limit)
         
         # Format response
         verses = []
-        for verse, book, annotation in results:
+        for verse, chapter, book, annotation in results:
             verses.append({
                 'id': verse.id,
                 'book': {
                     'id': book.id,
                     'name': book.name,
-                    'abbrev': book.abbrev,
+                    'abbrev': book.abbreviation,
                     'testament': book.testament
                 },
-                'chapter_num': verse.chapter_num,
-                'verse_num': verse.verse_num,
+                'chapter_num': chapter.number,
+                'verse_num': verse.number,
                 'text': verse.text,
-                'reference': f'{book.name} {verse.chapter_num}:{verse.verse_num}',
+                'reference': f'{book.name} {chapter.number}:{verse.number}',
                 'annotation': {
                     'id': annotation.id,
                     'color': annotation.color,
-                    'note': annotation.note,
+                    'note': annotation.note_text,
                     'created_at': annotation.created_at.isoformat()
                 }
             })
         
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_newest_first_cursor(results[-1][3])
+        
         return jsonify({
             'success': True,
             'data': {
                 'verses': verses,
                 'total': total,
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'has_more': has_more,
+                'next_cursor': next_cursor
             }
         })
         
@@ -338,4 +440,3 @@ def search_annotated_verses():
             'success': False,
             'error': f'Erro interno: {str(e)}'
         }), 500
-
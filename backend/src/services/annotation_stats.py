@@ -0,0 +1,125 @@
+"""
+Materialized annotation counters
+
+annotation_stats holds one count per (book, annotation type). SQLite
+triggers on annotations keep it current on every insert, delete and
+type/verse change, whichever code path does the write, so
+/annotations/stats reads a few hundred rows at most instead of counting and
+joining the whole annotations table.
+
+Counters can drift if verses are re-imported under existing annotations;
+rebuild them with:
+
+    python -m src.services.annotation_stats [--check]
+"""
+import sys
+
+from sqlalchemy import text
+
+# Book of an annotation row (0 if its verse no longer exists)
+_BOOK_OF = '''COALESCE((
+    SELECT c.book_id FROM verses v JOIN chapters c ON c.id = v.chapter_id
+    WHERE v.id = {row}.verse_id
+), 0)'''
+
+def _increment(row, delta):
+    return f'''
+        INSERT OR IGNORE INTO annotation_stats (book_id, type, count)
+        VALUES ({_BOOK_OF.format(row=row)}, {row}.type, 0);
+        UPDATE annotation_stats SET count = count + ({delta})
+        WHERE book_id = {_BOOK_OF.format(row=row)} AND type = {row}.type;
+    '''
+
+ANNOTATION_STATS_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS annotation_stats (
+        book_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (book_id, type)
+    ) WITHOUT ROWID
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_stats_insert
+    AFTER INSERT ON annotations
+    BEGIN {_increment('NEW', 1)} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_stats_delete
+    AFTER DELETE ON annotations
+    BEGIN {_increment('OLD', -1)} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_stats_update
+    AFTER UPDATE OF type, verse_id ON annotations
+    WHEN OLD.type IS NOT NEW.type OR OLD.verse_id IS NOT NEW.verse_id
+    BEGIN {_increment('OLD', -1)} {_increment('NEW', 1)} END
+    ''',
+]
+
+GROUND_TRUTH_QUERY = '''
+    SELECT COALESCE(c.book_id, 0), a.type, COUNT(*)
+    FROM annotations a
+    LEFT JOIN verses v ON v.id = a.verse_id
+    LEFT JOIN chapters c ON c.id = v.chapter_id
+    GROUP BY 1, 2
+'''
+
+def install_annotation_stats(conn):
+    """Create the counter table and its triggers on a SQLAlchemy connection, filling a new table"""
+    created = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'annotation_stats'"
+    )).first() is None
+
+    for statement in ANNOTATION_STATS_DDL:
+        conn.execute(text(statement))
+
+    if created:
+        rebuild_annotation_stats(conn)
+
+def read_annotation_stats(conn):
+    """{(book_id, type): count} for every non-zero counter"""
+    rows = conn.execute(text('SELECT book_id, type, count FROM annotation_stats WHERE count != 0'))
+    return {(book_id, annotation_type): count for book_id, annotation_type, count in rows}
+
+def rebuild_annotation_stats(conn):
+    """
+    Recount from the annotations table and replace the counters.
+    Returns {(book_id, type): (stored, actual)} for every counter that was wrong.
+    """
+    stored = read_annotation_stats(conn)
+    actual = {(book_id, annotation_type): count
+              for book_id, annotation_type, count in conn.execute(text(GROUND_TRUTH_QUERY))}
+
+    conn.execute(text('DELETE FROM annotation_stats'))
+    if actual:
+        conn.execute(
+            text('INSERT INTO annotation_stats (book_id, type, count) VALUES (:book_id, :type, :count)'),
+            [{'book_id': book_id, 'type': annotation_type, 'count': count}
+             for (book_id, annotation_type), count in actual.items()]
+        )
+
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in stored.keys() | actual.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+if __name__ == '__main__':
+    # --check: report drift without changing anything
+    from src.main import app
+    from src.models.bible import db
+
+    check_only = '--check' in sys.argv[1:]
+    with app.app_context():
+        with db.engine.connect() as conn:
+            drift = rebuild_annotation_stats(conn)
+            if check_only:
+                conn.rollback()
+            else:
+                conn.commit()
+
+    for (book_id, annotation_type), (stored, actual) in sorted(drift.items()):
+        print(f"book {book_id} {annotation_type}: stored {stored}, actual {actual}")
+    print(f"{len(drift)} counters {'out of date' if check_only else 'corrected'}")
+    sys.exit(1 if drift and check_only else 0)
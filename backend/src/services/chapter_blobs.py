@@ -0,0 +1,112 @@
+"""
+Pre-rendered chapter responses
+
+There are only 1,189 distinct chapter payloads per corpus build, so each one
+is serialized once, on its first request, and kept as the final response
+bytes: the JSON body plus its gzip and (when the brotli package is
+installed) brotli encodings. Serving a chapter is then a dictionary lookup
+and a choice of bytes based on Accept-Encoding, with no dict building,
+jsonify or compression on the hot path.
+
+Rendering is lazy because brotli at its best quality costs ~10 ms per
+chapter (13 s for the whole Bible), which would stall startup. Blobs belong
+to one corpus object, so loading a new corpus starts a fresh cache.
+
+Concurrent first requests for a chapter are coalesced (see single_flight):
+one renders and compresses it while the others wait for its blob. Blobs
+live in each worker's memory, so this stops at the worker boundary; a lock
+across workers would only make them take turns rendering the same bytes.
+"""
+import gzip
+
+from flask import Response, current_app
+
+from src.services.single_flight import SingleFlight
+
+try:
+    import brotli
+except ImportError:  # optional; chapters are then offered as gzip only
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Content codings stored for every chapter, most preferred first
+CHAPTER_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+def chapter_payload(corpus, book_id, chapter_num):
+    """The /books/<id>/chapters/<n> response body, or None if the chapter does not exist"""
+    book = corpus.get_book(book_id)
+    verses = corpus.get_chapter_verses(book_id, chapter_num) if book else None
+    if not verses:
+        return None
+
+    return {
+        'success': True,
+        'data': {
+            'book': {
+                'id': book['id'],
+                'name': book['name'],
+                'testament': book['testament']
+            },
+            'chapter': chapter_num,
+            'verses': verses,
+            'navigation': corpus.get_navigation(book_id, chapter_num)
+        }
+    }
+
+def encode_blob(body):
+    """{content coding: bytes} for a rendered body"""
+    blob = {
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    }
+    if brotli:
+        blob['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return blob
+
+class ChapterBlobs:
+    """Rendered and compressed chapter responses of one corpus, by chapter ordinal"""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self._blobs = {}
+        self._rendering = SingleFlight()
+
+    def get(self, book_id, chapter_num):
+        """{content coding: bytes} for a chapter, rendering it on first use; None if it does not exist"""
+        ordinal = self.corpus.chapter_ordinal(book_id, chapter_num)
+        if ordinal is None:
+            return None
+
+        blob = self._blobs.get(ordinal)
+        if blob is None:
+            blob = self._rendering.run(ordinal, lambda: self._render(ordinal, book_id, chapter_num))
+        return blob
+
+    def _render(self, ordinal, book_id, chapter_num):
+        # A render that finished just before this one started already stored it
+        blob = self._blobs.get(ordinal)
+        if blob is None:
+            payload = chapter_payload(self.corpus, book_id, chapter_num)
+            # Same bytes jsonify would produce under the app's JSON settings
+            blob = encode_blob(current_app.json.response(payload).get_data())
+            self._blobs[ordinal] = blob
+        return blob
+
+_chapter_blobs = None
+
+def get_chapter_blobs(corpus):
+    """Blob cache for a corpus, replacing the cache of a previously loaded one"""
+    global _chapter_blobs
+    blobs = _chapter_blobs
+    if blobs is None or blobs.corpus is not corpus:
+        blobs = _chapter_blobs = ChapterBlobs(corpus)
+    return blobs
+
+def blob_response(blob, encoding):
+    """200 JSON response carrying one stored encoding of a blob"""
+    response = Response(blob[encoding], status=200, mimetype='application/json')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    return response
@@ -0,0 +1,329 @@
+"""
+Response cache shared by all workers
+
+Each gunicorn worker is a separate process, so an in-process cache would be
+filled once per worker. Successful JSON responses of the search and stats
+views are instead stored where every worker can read them: by default a
+small SQLite file (SQLiteCacheBackend) in the app's instance folder, or in
+RESPONSE_CACHE_DIR if configured. The directory is created private to the
+app's user and the cache and lock files readable by it alone, so other local
+users can neither read nor plant entries. A Redis-compatible server can take
+its place by implementing CacheBackend and passing it to
+set_response_cache().
+
+Entries are keyed by the route path and its normalized query params (sorted,
+empty values dropped), the corpus digest, and the current generation of
+each tag the view depends on. Keys and tags are prefixed with a namespace
+derived from the ORM database URI and instance path (cache_namespace), so
+deployments sharing a host, and so the cache file, never read or
+invalidate each other's entries. Annotation writes bump the tags they touch
+(see invalidate_annotation): 'annotations' for stats and /search/annotated,
+and the chapter's tag for its overlay. Entries built under an older
+generation are never read again and age out through TTL and LRU eviction.
+Text and reference searches carry no tag, so they survive annotation writes.
+
+Concurrent misses of one key are coalesced (see single_flight): one request
+per host renders the response while identical ones wait for the lock, then
+read what it stored; a request kept waiting past the flight's timeout
+renders the response itself.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache, wraps
+from pathlib import Path
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request
+
+from src.services.corpus import get_corpus
+from src.services.single_flight import SingleFlight
+from src.services.verse_key import split_verse_key
+
+# Shared by the workers of one host, in the directory of response_cache_dir()
+RESPONSE_CACHE_FILE = 'response-cache.db'
+RESPONSE_LOCK_FILE = 'response-cache.lock'
+
+# Entries kept before the least recently used are evicted
+MAX_ENTRIES = 10000
+# Seconds before an entry expires. Scripture-only responses change with the
+# corpus digest, which is part of the key; annotation-backed ones are also
+# invalidated by generation, the TTL only bounds writes made outside the API
+SEARCH_TTL = 24 * 60 * 60
+ANNOTATIONS_TTL = 5 * 60
+
+ANNOTATIONS_TAG = 'annotations'
+
+class CacheBackend(ABC):
+    """
+    Storage for the response cache. Maps directly onto Redis commands:
+    get -> GET, set -> SET key value EX ttl, generations -> MGET,
+    bump -> INCR per tag; LRU eviction is then the server's
+    maxmemory-policy allkeys-lru.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Stored bytes, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Store bytes for `ttl` seconds"""
+
+    @abstractmethod
+    def generations(self, tags):
+        """{tag: generation} of the tags (0 for a tag never bumped)"""
+
+    @abstractmethod
+    def bump(self, tags):
+        """Advance the generation of each tag"""
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache in a local SQLite file (WAL), LRU-evicted past max_entries"""
+
+    # Seconds between refreshes of an entry's access time, so most hits are
+    # reads only
+    ACCESS_RESOLUTION = 30
+    # Eviction runs once per this many writes in a worker
+    EVICT_EVERY = 32
+
+    SCHEMA = [
+        '''
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at ON response_cache (accessed_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            tag TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+    ]
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # SQLite gives the -wal and -shm files the database file's mode
+            os.close(open_private(self.path))
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT value, expires_at, accessed_at FROM response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[1] <= now:
+            return None
+        if now - row[2] > self.ACCESS_RESOLUTION:
+            conn.execute('UPDATE response_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, value, ttl):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now)
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used past max_entries"""
+        conn = self._connection()
+        conn.execute('DELETE FROM response_cache WHERE expires_at <= ?', (time.time(),))
+        conn.execute('''
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+
+    def generations(self, tags):
+        placeholders = ', '.join('?' * len(tags))
+        stored = dict(self._connection().execute(
+            f'SELECT tag, generation FROM cache_generations WHERE tag IN ({placeholders})', list(tags)
+        ))
+        return {tag: stored.get(tag, 0) for tag in tags}
+
+    def bump(self, tags):
+        self._connection().executemany('''
+            INSERT INTO cache_generations (tag, generation) VALUES (?, 1)
+            ON CONFLICT (tag) DO UPDATE SET generation = generation + 1
+        ''', [(tag,) for tag in tags])
+
+def open_private(path):
+    """
+    Descriptor of a file readable and writable by this user only, created
+    if missing; raises OSError if it belongs to another user
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        os.fchmod(fd, 0o600)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+def response_cache_dir():
+    """RESPONSE_CACHE_DIR or the current app's instance folder, created private"""
+    directory = Path(current_app.config.get('RESPONSE_CACHE_DIR') or current_app.instance_path)
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return directory
+
+@lru_cache(maxsize=None)
+def _default_cache(directory):
+    return (SQLiteCacheBackend(Path(directory) / RESPONSE_CACHE_FILE),
+            SingleFlight(Path(directory) / RESPONSE_LOCK_FILE))
+
+_backend = None
+_flight = None
+
+def get_response_cache():
+    """The cache backend, a SQLiteCacheBackend in response_cache_dir() unless replaced"""
+    if _backend is not None:
+        return _backend
+    return _default_cache(str(response_cache_dir()))[0]
+
+def get_response_flight():
+    """Coalescer of concurrent misses, locking across workers through a file beside the cache"""
+    if _backend is not None:
+        return _flight
+    return _default_cache(str(response_cache_dir()))[1]
+
+def set_response_cache(backend, lock_path=None):
+    """
+    Replace the cache backend (e.g. with a Redis-backed CacheBackend).
+    Concurrent misses are coalesced across workers through lock_path (a file
+    private to this user, see open_private), or within each worker if None.
+    """
+    global _backend, _flight
+    _backend = backend
+    _flight = SingleFlight(lock_path)
+
+def chapter_tag(book_order, chapter):
+    return f'chapter:{book_order}:{chapter}'
+
+def annotation_tags(verse_key):
+    """Tags an annotation on a verse affects"""
+    tags = [ANNOTATIONS_TAG]
+    if verse_key:
+        book_order, chapter, _ = split_verse_key(verse_key)
+        tags.append(chapter_tag(book_order, chapter))
+    return tags
+
+@lru_cache(maxsize=None)
+def _namespace(database_uri, instance_path):
+    return hashlib.sha256(f'{database_uri}|{instance_path}'.encode('utf-8')).hexdigest()[:16]
+
+def cache_namespace():
+    """Prefix of the current app's keys and tags, identifying its database"""
+    # Relative SQLite URIs are resolved against the instance path
+    return _namespace(current_app.config.get('SQLALCHEMY_DATABASE_URI'), current_app.instance_path)
+
+def _namespaced_tags(tags):
+    namespace = cache_namespace()
+    return [f'{namespace}:{tag}' for tag in tags]
+
+def invalidate_annotation(verse_key):
+    """Invalidate cached responses that depend on annotations of a verse"""
+    try:
+        get_response_cache().bump(_namespaced_tags(annotation_tags(verse_key)))
+    except Exception as e:
+        # The write itself succeeded; stale entries still expire by TTL
+        current_app.logger.warning(f'Response cache not invalidated: {e}')
+
+def normalized_request_key():
+    """Route path and its non-empty query params in sorted order"""
+    params = sorted((name, value) for name, value in request.args.items(multi=True) if value)
+    return f'{request.path}?{urlencode(params)}'
+
+def _cached_response(body):
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def response_cached(ttl=SEARCH_TTL, tags=()):
+    """
+    Serve a GET view's successful JSON responses from the shared cache.
+    `tags` lists the generations the response depends on, or is a callable
+    taking the view's arguments and returning them.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                view_tags = _namespaced_tags(tags(*args, **kwargs) if callable(tags) else tags)
+                backend = get_response_cache()
+                key = f'{cache_namespace()}|{normalized_request_key()}|{get_corpus().digest}'
+                if view_tags:
+                    generations = backend.generations(view_tags)
+                    key += '|' + ','.join(f'{tag}={generations[tag]}' for tag in view_tags)
+                body = backend.get(key)
+            except Exception as e:
+                current_app.logger.warning(f'Response cache unavailable: {e}')
+                return view(*args, **kwargs)
+
+            if body is not None:
+                return _cached_response(body)
+
+            rendered = []
+
+            def render():
+                # Another worker may have stored it while this one waited
+                try:
+                    body = backend.get(key)
+                except Exception:
+                    body = None
+                if body is not None:
+                    return body
+
+                response = make_response(view(*args, **kwargs))
+                rendered.append(response)
+                if response.status_code != 200 or response.mimetype != 'application/json':
+                    return None
+                body = response.get_data()
+                try:
+                    backend.set(key, body, ttl)
+                except Exception as e:
+                    current_app.logger.warning(f'Response not cached: {e}')
+                return body
+
+            body = get_response_flight().run(key, render)
+            if rendered:
+                # This request rendered the response itself
+                response = rendered[0]
+                if body is not None:
+                    response.headers['X-Cache'] = 'MISS'
+                return response
+            if body is not None:
+                return _cached_response(body)
+            # The request this one waited for failed; errors are not shared
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,123 @@
+"""
+Full-text search index over verse text (SQLite FTS5)
+
+The index is an external-content FTS5 table keyed on ``verses.id``, so it only
+stores the inverted index and reads the verse text from ``verses`` itself.
+The ``unicode61`` tokenizer with ``remove_diacritics 2`` folds Portuguese
+accents (ç, ã, é, ô...), so "graca" matches "graça" and vice versa.
+
+The index lives in the scripture database (src/bible.db), which serves every
+scripture read, references and text search included; the ORM database only
+backs annotations.
+"""
+import re
+import sqlite3
+import sys
+import unicodedata
+
+FTS_TABLE = 'verses_fts'
+FTS_TOKENIZER = 'unicode61 remove_diacritics 2'
+
+# Same notion of "word" as the unicode61 tokenizer: letters and digits
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Control characters never present in verse text, used to mark matches
+# in highlight()/snippet() output before they are turned into offsets
+MATCH_OPEN = '\x02'
+MATCH_CLOSE = '\x03'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+def fold_accents(text):
+    """Lowercase and strip diacritics, matching what the FTS tokenizer indexes"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def create_search_index(cursor):
+    """Create the FTS5 table over verses.text if it does not exist"""
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            text,
+            content='verses',
+            content_rowid='id',
+            tokenize='{FTS_TOKENIZER}',
+            prefix='2 3'
+        )
+    ''')
+
+def rebuild_search_index(cursor):
+    """(Re)build the FTS5 index from the current contents of verses"""
+    create_search_index(cursor)
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def index_verse(cursor, verse_id, text):
+    """Add one verse to the index (external content is not tracked automatically)"""
+    cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (?, ?)', (verse_id, text))
+
+def unindex_verse(cursor, verse_id, text):
+    """Remove one verse from the index; `text` must be the text it was indexed with"""
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', ?, ?)",
+        (verse_id, text)
+    )
+
+def has_search_index(cursor):
+    """Check whether the database already has the FTS5 table"""
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (FTS_TABLE,)
+    )
+    return cursor.fetchone() is not None
+
+def build_match_query(query_text):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+    Every word must match (implicit AND); the last word is matched as a prefix
+    so results keep up while the user is still typing.
+    Returns None when the input has no searchable words.
+    """
+    words = WORD_PATTERN.findall(fold_accents(query_text))
+    if not words:
+        return None
+
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def extract_match_offsets(marked_text):
+    """
+    Strip the MATCH_OPEN/MATCH_CLOSE markers produced by highlight()/snippet().
+    Returns (plain_text, [[start, end], ...]) with end-exclusive character
+    offsets into plain_text, so clients can highlight without re-scanning.
+    """
+    plain = []
+    offsets = []
+    position = 0
+    start = None
+
+    for char in marked_text:
+        if char == MATCH_OPEN:
+            start = position
+        elif char == MATCH_CLOSE:
+            if start is not None:
+                offsets.append([start, position])
+                start = None
+        else:
+            plain.append(char)
+            position += 1
+
+    return ''.join(plain), offsets
+
+if __name__ == '__main__':
+    # Build the index for an existing database: python search_index.py path/to/bible.db
+    if len(sys.argv) != 2:
+        print(f"Uso: {sys.argv[0]} caminho/para/bible.db")
+        sys.exit(1)
+
+    conn = sqlite3.connect(sys.argv[1])
+    try:
+        rebuild_search_index(conn.cursor())
+        conn.commit()
+        print(f"✅ Índice de busca criado em {sys.argv[1]}")
+    finally:
+        conn.close()
@@ -0,0 +1,132 @@
+"""
+Static export of the read-only scripture API
+
+Books, chapters, navigation and verses only change with the corpus, so the
+whole read-only surface of routes/bible.py can be rendered to files and
+served by nginx or a CDN, leaving gunicorn for annotations and search.
+Every body is produced by the app itself, so the files are byte-identical
+to the live responses.
+
+Each URL becomes <url>/index.json (so /api/books and /api/books/1/... can
+coexist), next to .gz and .br variants where they are smaller, for
+gzip_static/brotli_static. File mtimes are set to the corpus Last-Modified.
+Not exported, and left to the app: query-string variants (?testament=) and
+/navigation/<book>/<chapter>/jump/<count>, which has no fixed URL set.
+
+    python -m src.services.static_export export/
+
+A matching nginx location:
+
+    location /api/ {
+        default_type application/json;
+        gzip_static on;
+        brotli_static on;
+        if ($args) { proxy_pass http://gunicorn; }
+        try_files $uri/index.json @gunicorn;
+    }
+"""
+import argparse
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.services.chapter_blobs import encode_blob
+
+# File suffix of each stored content coding
+ENCODING_SUFFIXES = {
+    'identity': '',
+    'gzip': '.gz',
+    'br': '.br',
+}
+
+def export_urls(corpus):
+    """Every static read-only API URL of a corpus"""
+    yield '/api/books'
+    for book in corpus.books:
+        yield f"/api/books/{book['id']}"
+
+    for ordinal in range(corpus.chapter_count):
+        book, chapter_number = corpus.chapter_at(ordinal)
+        yield f"/api/books/{book['id']}/chapters/{chapter_number}"
+        yield f"/api/navigation/{book['id']}/{chapter_number}"
+        yield f"/api/navigation/chapters/{ordinal + 1}"
+
+    for verse_id in corpus.verse_ids:
+        yield f'/api/verses/{verse_id}'
+
+def export_static_api(app, corpus, output, jobs=None):
+    """
+    Render every export_urls() response of `app` into `output`, replacing it
+    only once the export is complete. Bodies are compressed on `jobs`
+    processes (default: one per CPU). Returns a Counter of files and bytes
+    per content coding.
+    """
+    output = Path(output)
+    staging = output.with_name(f'{output.name}.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+
+    mtime = corpus.modified_at.timestamp() if corpus.modified_at else None
+    client = app.test_client()
+    stats = Counter()
+
+    urls = []
+    bodies = []
+    for url in export_urls(corpus):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}')
+        urls.append(url)
+        bodies.append(response.get_data())
+
+    # Brotli at quality 11 dominates the export time
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        blobs = executor.map(encode_blob, bodies, chunksize=256)
+
+        for url, body, blob in zip(urls, bodies, blobs):
+            path = staging / url.lstrip('/') / 'index.json'
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            for encoding, data in blob.items():
+                # Tiny bodies can grow when compressed; nginx then serves the plain file
+                if encoding != 'identity' and len(data) >= len(body):
+                    continue
+                encoded_path = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+                encoded_path.write_bytes(data)
+                if mtime is not None:
+                    os.utime(encoded_path, (mtime, mtime))
+                stats[f'{encoding}_files'] += 1
+                stats[f'{encoding}_bytes'] += len(data)
+            stats['urls'] += 1
+
+    # Swap the finished tree in, so a web server never sees a partial export
+    previous = output.with_name(f'{output.name}.old')
+    shutil.rmtree(previous, ignore_errors=True)
+    if output.exists():
+        output.rename(previous)
+    staging.rename(output)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta a API de leitura da Bíblia como arquivos estáticos')
+    parser.add_argument('output', help='diretório de saída (substituído por completo)')
+    parser.add_argument('--jobs', type=int, default=None, help='processos de compressão (padrão: um por CPU)')
+    args = parser.parse_args()
+
+    from src.main import app
+    from src.services.corpus import get_corpus
+
+    started = time.perf_counter()
+    corpus = get_corpus()
+    stats = export_static_api(app, corpus, args.output, jobs=args.jobs)
+
+    print(f"✅ {stats['urls']} URLs exportadas em {args.output} ({time.perf_counter() - started:.1f}s)")
+    for encoding in ENCODING_SUFFIXES:
+        if stats[f'{encoding}_files']:
+            print(f"   {encoding}: {stats[f'{encoding}_files']} arquivos, "
+                  f"{stats[f'{encoding}_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"🔑 Corpus: {corpus.digest}")
@@ -0,0 +1,31 @@
+"""
+Canonical packed verse keys (BBCCCVVV)
+
+A verse key is book_order * 1,000,000 + chapter * 1,000 + verse, so João 3:16
+is 43003016. Keys sort in canonical Bible order, which turns any verse range
+-- inside a chapter, across chapters or across books -- into one contiguous
+key range that SQLite answers with a single B-tree range scan.
+"""
+
+BOOK_FACTOR = 1_000_000
+CHAPTER_FACTOR = 1_000
+
+def make_verse_key(book_order, chapter, verse):
+    """Pack (book order, chapter, verse) into a BBCCCVVV key"""
+    if not (0 < book_order < 100 and 0 <= chapter < 1000 and 0 <= verse < 1000):
+        raise ValueError(f'Verse out of range: {book_order} {chapter}:{verse}')
+    return book_order * BOOK_FACTOR + chapter * CHAPTER_FACTOR + verse
+
+def split_verse_key(key):
+    """Unpack a BBCCCVVV key into (book order, chapter, verse)"""
+    book_order, rest = divmod(key, BOOK_FACTOR)
+    chapter, verse = divmod(rest, CHAPTER_FACTOR)
+    return book_order, chapter, verse
+
+def chapter_key_range(book_order, chapter):
+    """Inclusive (first, last) keys covering every verse of a chapter"""
+    return make_verse_key(book_order, chapter, 0), make_verse_key(book_order, chapter, 999)
+
+def book_key_range(book_order):
+    """Inclusive (first, last) keys covering every verse of a book"""
+    return make_verse_key(book_order, 0, 0), make_verse_key(book_order, 999, 999)
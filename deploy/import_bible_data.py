@@ -2,15 +2,17 @@
 """
 Script para importar dados completos da Bíblia
 """
-import json
 import os
 import sys
+import time
 
 # Add src to path
 sys.path.insert(0, 'src')
 
 from src.main import app, db
 from src.models.bible import Book, Chapter, Verse
+from src.services.bulk_import import import_pragmas, defer_indexes, bulk_insert, format_rate, ScriptureRows
+from src.services.json_stream import iter_json_array
 
 def import_complete_bible():
     """Importa dados completos da Bíblia NVI"""
@@ -38,61 +40,63 @@ def import_complete_bible():
     with app.app_context():
         print("Iniciando importação da Bíblia completa...")
         
-        # Carregar dados JSON
-        with open('nvi_complete.json', 'r', encoding='utf-8-sig') as f:
-            bible_data = json.load(f)
+        def iter_verses():
+            # Ler o JSON um livro por vez
+            with open('nvi_complete.json', 'r', encoding='utf-8-sig') as f:
+                for book_order, book_data in enumerate(iter_json_array(f), 1):
+                    book_name = book_data['name']
+                    book = {
+                        'order': book_order,
+                        'name': book_name,
+                        'abbreviation': book_abbreviations.get(book_name, book_name[:3]),
+                        # Determinar testamento
+                        'testament': "Antigo Testamento" if book_order <= 39 else "Novo Testamento"
+                    }
+                    
+                    for chapter_num, verses_data in enumerate(book_data['chapters'], 1):
+                        for verse_num, verse_text in enumerate(verses_data, 1):
+                            yield book, chapter_num, verse_num, verse_text
         
-        # Limpar dados existentes
-        db.session.query(Verse).delete()
-        db.session.query(Chapter).delete()
-        db.session.query(Book).delete()
-        db.session.commit()
+        # Linhas de livros e capítulos são montadas enquanto os versículos são inseridos
+        source = ScriptureRows(iter_verses())
         
-        book_order = 1
+        print("Importando livros, capítulos e versículos...")
         
-        for book_data in bible_data:
-            book_name = book_data['name']
-            book_chapters = book_data['chapters']
-            
-            # Determinar testamento
-            testament = "Antigo Testamento" if book_order <= 39 else "Novo Testamento"
-            
-            # Criar livro
-            book = Book(
-                name=book_name,
-                abbreviation=book_abbreviations.get(book_name, book_name[:3]),
-                testament=testament,
-                order=book_order,
-                chapters_count=len(book_chapters)
-            )
-            db.session.add(book)
-            db.session.flush()  # Para obter o ID
-            
-            print(f"Importando {book_name}...")
-            
-            for chapter_num, verses_data in enumerate(book_chapters, 1):
-                # Criar capítulo
-                chapter = Chapter(
-                    book_id=book.id,
-                    number=chapter_num,
-                    verses_count=len(verses_data)
-                )
-                db.session.add(chapter)
-                db.session.flush()  # Para obter o ID
+        # Carga em uma única transação, sem journal e sem fsync; os índices
+        # são criados depois da carga. A busca textual (FTS5) usa o banco de
+        # escrituras (src/bible.db), não este
+        conn = db.engine.raw_connection()
+        try:
+            with import_pragmas(conn):
+                started = time.perf_counter()
+                cursor = conn.cursor()
+                deferred = defer_indexes(cursor, ('books', 'chapters', 'verses'))
                 
-                for verse_num, verse_text in enumerate(verses_data, 1):
-                    # Criar versículo
-                    verse = Verse(
-                        chapter_id=chapter.id,
-                        number=verse_num,
-                        text=verse_text
-                    )
-                    db.session.add(verse)
-            
-            book_order += 1
+                # Limpar dados existentes
+                cursor.execute('DELETE FROM verses')
+                cursor.execute('DELETE FROM chapters')
+                cursor.execute('DELETE FROM books')
+                
+                rows = bulk_insert(cursor, 'verses',
+                                   ('id', 'chapter_id', 'number', 'verse_key', 'text', 'version'),
+                                   ((verse_id, chapter_id, verse_num, key, text, 'NVI')
+                                    for key, verse_id, _, chapter_id, _, verse_num, text in source.verse_rows()))
+                rows += bulk_insert(cursor, 'books',
+                                    ('id', 'name', 'abbreviation', 'testament', '"order"', 'chapters_count'),
+                                    ((book['order'], book['name'], book['abbreviation'], book['testament'],
+                                      book['order'], chapters_count)
+                                     for book, chapters_count in source.books))
+                rows += bulk_insert(cursor, 'chapters',
+                                    ('id', 'book_id', 'number', 'verses_count'), source.chapters)
+                
+                for sql in deferred:
+                    cursor.execute(sql)
+                conn.commit()
+                elapsed = time.perf_counter() - started
+        finally:
+            conn.close()
         
-        # Salvar todas as alterações
-        db.session.commit()
+        print(f"⚡ {format_rate(rows, elapsed)}")
         
         # Verificar importação
         total_books = db.session.query(Book).count()
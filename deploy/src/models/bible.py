@@ -1,6 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import contains_eager, joinedload
 from datetime import datetime
 
+from src.services.annotation_changes import install_annotation_changes
+from src.services.annotation_stats import install_annotation_stats
+
 db = SQLAlchemy()
 
 class Book(db.Model):
@@ -52,6 +57,7 @@ class Verse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False)
     number = db.Column(db.Integer, nullable=False)
+    verse_key = db.Column(db.Integer, unique=True, index=True)  # BBCCCVVV, see services/verse_key.py
     text = db.Column(db.Text, nullable=False)
     version = db.Column(db.String(10), default='NVI')  # Bible version
     
@@ -60,6 +66,7 @@ class Verse(db.Model):
             'id': self.id,
             'chapter_id': self.chapter_id,
             'number': self.number,
+            'key': self.verse_key,
             'text': self.text,
             'version': self.version,
             'reference': f"{self.chapter.book.name} {self.chapter.number}:{self.number}" if self.chapter and self.chapter.book else None
@@ -70,19 +77,32 @@ class Annotation(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     verse_id = db.Column(db.Integer, db.ForeignKey('verses.id'), nullable=False)
+    verse_key = db.Column(db.Integer, index=True)  # copied from the verse for range joins
     type = db.Column(db.String(20), nullable=False)  # 'highlight', 'note', 'bookmark'
     color = db.Column(db.String(7), nullable=True)  # Hex color for highlights
     note_text = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    change_seq = db.Column(db.Integer, index=True)  # set by trigger, see services/annotation_changes.py
     
     # Relationship
     verse = db.relationship('Verse', backref='annotations')
     
+    @staticmethod
+    def eager_options(joined=False):
+        """
+        Loader option that fetches verse, chapter and book together with the
+        annotations, so to_dict() never lazy-loads them one row at a time.
+        joined=True reuses joins the query already has instead of adding its own.
+        """
+        load = contains_eager if joined else joinedload
+        return load(Annotation.verse).options(load(Verse.chapter).options(load(Chapter.book)))
+    
     def to_dict(self):
         return {
             'id': self.id,
             'verse_id': self.verse_id,
+            'verse_key': self.verse_key,
             'type': self.type,
             'color': self.color,
             'note_text': self.note_text,
@@ -92,3 +112,68 @@ class Annotation(db.Model):
             'verse_text': self.verse.text if self.verse else None
         }
 
+class AnnotationTombstone(db.Model):
+    """A deleted annotation, left by trigger so /annotations/changes can report the delete"""
+    __tablename__ = 'annotation_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)  # id the annotation had
+    verse_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    change_seq = db.Column(db.Integer, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'verse_id': self.verse_id,
+            'deleted_at': self.deleted_at.isoformat()
+        }
+
+def upgrade_schema():
+    """
+    Add the verse_key and change_seq columns, newer indexes and the
+    annotation_stats / annotation_changes triggers to databases created
+    before they existed, backfilling the columns (db.create_all only creates
+    missing tables, not columns or indexes on existing tables)
+    """
+    inspector = inspect(db.engine)
+    tables = inspector.get_table_names()
+    if not {'verses', 'annotations', 'annotation_tombstones'} <= set(tables):
+        return
+
+    verse_columns = {column['name'] for column in inspector.get_columns('verses')}
+    annotation_columns = {column['name'] for column in inspector.get_columns('annotations')}
+    tombstone_columns = {column['name'] for column in inspector.get_columns('annotation_tombstones')}
+
+    with db.engine.begin() as conn:
+        if 'verse_key' not in verse_columns:
+            conn.execute(text('ALTER TABLE verses ADD COLUMN verse_key INTEGER'))
+            conn.execute(text('''
+                UPDATE verses SET verse_key = (
+                    SELECT b."order" * 1000000 + c.number * 1000 + verses.number
+                    FROM chapters c JOIN books b ON b.id = c.book_id
+                    WHERE c.id = verses.chapter_id
+                )
+            '''))
+            conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_verses_verse_key ON verses (verse_key)'))
+
+        if 'verse_key' not in annotation_columns:
+            conn.execute(text('ALTER TABLE annotations ADD COLUMN verse_key INTEGER'))
+            conn.execute(text('''
+                UPDATE annotations SET verse_key = (
+                    SELECT verse_key FROM verses WHERE verses.id = annotations.verse_id
+                )
+            '''))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_annotations_verse_key ON annotations (verse_key)'))
+
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_annotations_updated_at ON annotations (updated_at)'))
+
+        if 'change_seq' not in annotation_columns:
+            conn.execute(text('ALTER TABLE annotations ADD COLUMN change_seq INTEGER'))
+        if 'change_seq' not in tombstone_columns:
+            conn.execute(text('ALTER TABLE annotation_tombstones ADD COLUMN change_seq INTEGER'))
+
+        # Sequence numbers behind /annotations/changes
+        install_annotation_changes(conn)
+
+        # Trigger-maintained counters behind /annotations/stats
+        install_annotation_stats(conn)
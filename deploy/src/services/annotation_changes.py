@@ -0,0 +1,91 @@
+"""
+Change sequence behind /annotations/changes
+
+Every write to annotations takes the next number from a single-row counter
+(annotation_change_seq) and stores it in the row's change_seq; a delete
+leaves a tombstone in annotation_tombstones numbered from the same counter.
+SQLite triggers do this inside the writing transaction, which holds the
+database's write lock until it commits, so numbers are handed out in commit
+order. A client that has seen change N has therefore seen every change
+before N, which wall-clock timestamps stamped before the lock cannot promise.
+
+The triggers also drop the tombstone of an id SQLite hands out again, so
+every code path that writes annotations is tracked, not only the API.
+"""
+from sqlalchemy import text
+
+# Bumps the counter, then evaluates to the number just taken
+_NEXT_SEQ = 'UPDATE annotation_change_seq SET seq = seq + 1 WHERE id = 1;'
+_CURRENT_SEQ = '(SELECT seq FROM annotation_change_seq WHERE id = 1)'
+
+# Same text format SQLAlchemy writes for DateTime columns
+_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+ANNOTATION_CHANGES_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS annotation_change_seq (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        seq INTEGER NOT NULL
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_changes_insert
+    AFTER INSERT ON annotations
+    BEGIN
+        {_NEXT_SEQ}
+        UPDATE annotations SET change_seq = {_CURRENT_SEQ} WHERE id = NEW.id;
+        DELETE FROM annotation_tombstones WHERE id = NEW.id;
+    END
+    ''',
+    # The guard skips the trigger's own change_seq update
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_changes_update
+    AFTER UPDATE ON annotations
+    WHEN NEW.change_seq IS OLD.change_seq
+    BEGIN
+        {_NEXT_SEQ}
+        UPDATE annotations SET change_seq = {_CURRENT_SEQ} WHERE id = NEW.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS annotation_changes_delete
+    AFTER DELETE ON annotations
+    BEGIN
+        {_NEXT_SEQ}
+        INSERT OR REPLACE INTO annotation_tombstones (id, verse_id, deleted_at, change_seq)
+        VALUES (OLD.id, OLD.verse_id, {_NOW}, {_CURRENT_SEQ});
+    END
+    ''',
+]
+
+def install_annotation_changes(conn):
+    """
+    Create the counter and its triggers on a SQLAlchemy connection. Rows
+    written before the sequence existed are numbered in (timestamp, id) order.
+    """
+    for table in ('annotations', 'annotation_tombstones'):
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)'))
+
+    unnumbered = conn.execute(text('''
+        SELECT 'annotations', id, updated_at FROM annotations WHERE change_seq IS NULL
+        UNION ALL
+        SELECT 'annotation_tombstones', id, deleted_at FROM annotation_tombstones WHERE change_seq IS NULL
+        ORDER BY 3, 2
+    ''')).all()
+    last_seq = conn.execute(text('''
+        SELECT MAX(COALESCE((SELECT MAX(change_seq) FROM annotations), 0),
+                   COALESCE((SELECT MAX(change_seq) FROM annotation_tombstones), 0))
+    ''')).scalar()
+
+    for table, row_id, _ in unnumbered:
+        last_seq += 1
+        conn.execute(text(f'UPDATE {table} SET change_seq = :seq WHERE id = :id'),
+                     {'seq': last_seq, 'id': row_id})
+
+    conn.execute(text(ANNOTATION_CHANGES_DDL[0]))
+    conn.execute(text('INSERT OR IGNORE INTO annotation_change_seq (id, seq) VALUES (1, 0)'))
+    conn.execute(text('UPDATE annotation_change_seq SET seq = MAX(seq, :seq) WHERE id = 1'),
+                 {'seq': last_seq})
+
+    for statement in ANNOTATION_CHANGES_DDL[1:]:
+        conn.execute(text(statement))
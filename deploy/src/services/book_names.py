@@ -0,0 +1,193 @@
+"""
+Book name resolution
+
+Maps whatever a user types for a book (the Portuguese name, an abbreviation
+such as 'Jo' or '1Co', an unaccented form like 'Joao', the English name, or
+a close misspelling) to the book's canonical order, entirely in memory.
+
+Lookups try, in turn: the exact name with accents, the accent-folded name,
+a prefix of a name ('Gen', 'Apoc'), a prefix of one of its later words
+('Coríntios', 'Samuel') and finally a bounded edit distance ('Genesys').
+Partial matches need a few letters, so short words such as 'fé' or 'rei'
+never stand for a book they happen to occur in. Results are memoized, so
+repeated lookups are a dictionary hit.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# (order, name, abbreviation, English name, other aliases)
+BOOK_NAMES = (
+    (1, 'Gênesis', 'Gn', 'Genesis', ()),
+    (2, 'Êxodo', 'Ex', 'Exodus', ()),
+    (3, 'Levítico', 'Lv', 'Leviticus', ()),
+    (4, 'Números', 'Nm', 'Numbers', ()),
+    (5, 'Deuteronômio', 'Dt', 'Deuteronomy', ()),
+    (6, 'Josué', 'Js', 'Joshua', ()),
+    (7, 'Juízes', 'Jz', 'Judges', ()),
+    (8, 'Rute', 'Rt', 'Ruth', ()),
+    (9, '1 Samuel', '1Sm', '1 Samuel', ()),
+    (10, '2 Samuel', '2Sm', '2 Samuel', ()),
+    (11, '1 Reis', '1Rs', '1 Kings', ()),
+    (12, '2 Reis', '2Rs', '2 Kings', ()),
+    (13, '1 Crônicas', '1Cr', '1 Chronicles', ()),
+    (14, '2 Crônicas', '2Cr', '2 Chronicles', ()),
+    (15, 'Esdras', 'Ed', 'Ezra', ()),
+    (16, 'Neemias', 'Ne', 'Nehemiah', ()),
+    (17, 'Ester', 'Et', 'Esther', ()),
+    (18, 'Jó', 'Jó', 'Job', ()),
+    (19, 'Salmos', 'Sl', 'Psalms', ('Salmo', 'Psalm')),
+    (20, 'Provérbios', 'Pv', 'Proverbs', ()),
+    (21, 'Eclesiastes', 'Ec', 'Ecclesiastes', ()),
+    (22, 'Cânticos', 'Ct', 'Song of Solomon', ('Cantares', 'Cântico dos Cânticos', 'Song of Songs')),
+    (23, 'Isaías', 'Is', 'Isaiah', ()),
+    (24, 'Jeremias', 'Jr', 'Jeremiah', ()),
+    (25, 'Lamentações', 'Lm', 'Lamentations', ()),
+    (26, 'Ezequiel', 'Ez', 'Ezekiel', ()),
+    (27, 'Daniel', 'Dn', 'Daniel', ()),
+    (28, 'Oséias', 'Os', 'Hosea', ('Oseias',)),
+    (29, 'Joel', 'Jl', 'Joel', ()),
+    (30, 'Amós', 'Am', 'Amos', ()),
+    (31, 'Obadias', 'Ob', 'Obadiah', ()),
+    (32, 'Jonas', 'Jn', 'Jonah', ()),
+    (33, 'Miquéias', 'Mq', 'Micah', ('Miqueias',)),
+    (34, 'Naum', 'Na', 'Nahum', ()),
+    (35, 'Habacuque', 'Hc', 'Habakkuk', ()),
+    (36, 'Sofonias', 'Sf', 'Zephaniah', ()),
+    (37, 'Ageu', 'Ag', 'Haggai', ()),
+    (38, 'Zacarias', 'Zc', 'Zechariah', ()),
+    (39, 'Malaquias', 'Ml', 'Malachi', ()),
+    (40, 'Mateus', 'Mt', 'Matthew', ()),
+    (41, 'Marcos', 'Mc', 'Mark', ()),
+    (42, 'Lucas', 'Lc', 'Luke', ()),
+    (43, 'João', 'Jo', 'John', ()),
+    (44, 'Atos', 'At', 'Acts', ('Atos dos Apóstolos',)),
+    (45, 'Romanos', 'Rm', 'Romans', ()),
+    (46, '1 Coríntios', '1Co', '1 Corinthians', ()),
+    (47, '2 Coríntios', '2Co', '2 Corinthians', ()),
+    (48, 'Gálatas', 'Gl', 'Galatians', ()),
+    (49, 'Efésios', 'Ef', 'Ephesians', ()),
+    (50, 'Filipenses', 'Fp', 'Philippians', ()),
+    (51, 'Colossenses', 'Cl', 'Colossians', ()),
+    (52, '1 Tessalonicenses', '1Ts', '1 Thessalonians', ()),
+    (53, '2 Tessalonicenses', '2Ts', '2 Thessalonians', ()),
+    (54, '1 Timóteo', '1Tm', '1 Timothy', ()),
+    (55, '2 Timóteo', '2Tm', '2 Timothy', ()),
+    (56, 'Tito', 'Tt', 'Titus', ()),
+    (57, 'Filemom', 'Fm', 'Philemon', ()),
+    (58, 'Hebreus', 'Hb', 'Hebrews', ()),
+    (59, 'Tiago', 'Tg', 'James', ()),
+    (60, '1 Pedro', '1Pe', '1 Peter', ()),
+    (61, '2 Pedro', '2Pe', '2 Peter', ()),
+    (62, '1 João', '1Jo', '1 John', ()),
+    (63, '2 João', '2Jo', '2 John', ()),
+    (64, '3 João', '3Jo', '3 John', ()),
+    (65, 'Judas', 'Jd', 'Jude', ()),
+    (66, 'Apocalipse', 'Ap', 'Revelation', ('Revelations',)),
+)
+
+# Shortest input tried against name prefixes, prefixes of later words in a
+# name, and misspellings (shorter words are too often one edit away from a book:
+# 'amor' / 'Amós')
+MIN_PARTIAL_LENGTH = 2
+MIN_WORD_PREFIX_LENGTH = 4
+MIN_FUZZY_LENGTH = 5
+
+def _compact(name):
+    """Casefolded, without spaces and dots; 'I'/'II'/'III' prefixes become digits"""
+    name = name.casefold().strip()
+    name = re.sub(r'^(i{1,3})\s+', lambda match: str(len(match.group(1))), name)
+    return re.sub(r'[\s.]+', '', name)
+
+def fold_book_name(name):
+    """_compact() without accents: 'João' -> 'joao', '1 Co.' -> '1co'"""
+    decomposed = unicodedata.normalize('NFKD', _compact(name))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def _edit_distance(a, b, bound):
+    """Levenshtein distance of a and b, or bound + 1 once it is known to exceed bound"""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
+
+def _build_indexes():
+    exact, folded, names = {}, {}, []  # names: (folded name, order) in canonical order
+    # Full names first, so an abbreviation never shadows another book's name
+    for order, name, abbreviation, english, aliases in BOOK_NAMES:
+        for alias in (name, english) + aliases:
+            exact.setdefault(_compact(alias), order)
+            folded.setdefault(fold_book_name(alias), order)
+            names.append((fold_book_name(alias), order))
+    for order, name, abbreviation, english, aliases in BOOK_NAMES:
+        exact.setdefault(_compact(abbreviation), order)
+        folded.setdefault(fold_book_name(abbreviation), order)
+
+    # Prefixes of full names, the earliest book winning ('Ju' -> Juízes)
+    prefixes = {}
+    for alias, order in names:
+        for length in range(MIN_PARTIAL_LENGTH, len(alias)):
+            prefixes.setdefault(alias[:length], order)
+
+    # Prefixes of a name from its second word on ('Corín' -> 1 Coríntios)
+    word_prefixes = {}
+    for order, name, abbreviation, english, aliases in BOOK_NAMES:
+        for alias in (name, english) + aliases:
+            words = alias.split()
+            for start in range(1, len(words)):
+                tail = fold_book_name(' '.join(words[start:]))
+                for length in range(MIN_WORD_PREFIX_LENGTH, len(tail) + 1):
+                    word_prefixes.setdefault(tail[:length], order)
+    return exact, folded, prefixes, word_prefixes, names
+
+_EXACT, _FOLDED, _PREFIXES, _WORD_PREFIXES, _NAMES = _build_indexes()
+_ABBREVIATIONS = {order: abbreviation for order, _, abbreviation, _, _ in BOOK_NAMES}
+
+def book_abbreviation(order):
+    """Standard abbreviation of a book by canonical order ('Jo' for 43), or None"""
+    return _ABBREVIATIONS.get(order)
+
+def lookup_book_order(book_name):
+    """Canonical order of a full name or abbreviation (accents optional), or None; no partial matches"""
+    order = _EXACT.get(_compact(book_name))
+    return order if order is not None else _FOLDED.get(fold_book_name(book_name))
+
+@lru_cache(maxsize=4096)
+def resolve_book_order(book_name):
+    """Canonical order (1-66) of the book a user-typed name refers to, or None"""
+    order = lookup_book_order(book_name)
+    if order is not None:
+        return order
+
+    key = fold_book_name(book_name)
+    if len(key) < MIN_PARTIAL_LENGTH:
+        return None
+    if key in _PREFIXES:
+        return _PREFIXES[key]
+
+    if len(key) >= MIN_WORD_PREFIX_LENGTH and key in _WORD_PREFIXES:
+        return _WORD_PREFIXES[key]
+
+    if len(key) < MIN_FUZZY_LENGTH:
+        return None
+
+    # Misspellings: one edit for short names, two for longer ones
+    bound = 1 if len(key) <= 5 else 2
+    best_order, best_distance = None, bound + 1
+    for name, order in _NAMES:
+        distance = _edit_distance(key, name, bound)
+        if distance < best_distance:
+            best_order, best_distance = order, distance
+    return best_order
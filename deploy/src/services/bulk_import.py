@@ -0,0 +1,138 @@
+"""
+Bulk loading for the scripture importers
+
+A translation is loaded in one transaction with executemany, with the
+rollback journal and fsyncs turned off while it runs (IMPORT_PRAGMAS), and
+secondary indexes are dropped before the load and rebuilt once afterwards
+instead of being updated row by row.
+
+With journal_mode=OFF an interrupted import cannot be rolled back: the
+database is left half-loaded and the import has to be run again.
+"""
+import time
+from contextlib import contextmanager
+
+from src.services.schema import create_scripture_schema, create_scripture_indexes
+from src.services.search_index import rebuild_search_index
+from src.services.verse_key import make_verse_key
+
+IMPORT_PRAGMAS = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': -64 * 1024,  # negative = KiB instead of pages
+}
+
+@contextmanager
+def import_pragmas(conn):
+    """Apply IMPORT_PRAGMAS to a sqlite3 connection, restoring the previous values on exit"""
+    previous = {name: conn.execute(f'PRAGMA {name}').fetchone()[0] for name in IMPORT_PRAGMAS}
+    for name, value in IMPORT_PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+    try:
+        yield conn
+    finally:
+        # journal_mode can only be changed outside a transaction
+        if conn.in_transaction:
+            conn.rollback()
+        for name, value in previous.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+
+def defer_indexes(cursor, tables):
+    """Drop the indexes of `tables` before a bulk load; returns the SQL to recreate them"""
+    placeholders = ', '.join('?' * len(tables))
+    cursor.execute(f'''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', tuple(tables))
+    indexes = cursor.fetchall()
+
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+def bulk_insert(cursor, table, columns, rows):
+    """INSERT an iterable of row tuples with a single executemany; returns the row count"""
+    placeholders = ', '.join('?' * len(columns))
+    cursor.executemany(
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})',
+        rows
+    )
+    return cursor.rowcount
+
+def format_rate(rows, seconds):
+    """Human-readable load rate for the importers' output"""
+    rate = rows / seconds if seconds > 0 else float(rows)
+    return f'{rows} linhas em {seconds:.2f}s ({rate:.0f} linhas/s)'
+
+class ScriptureRows:
+    """
+    Split a stream of (book, chapter_number, verse_number, text) tuples, in
+    canonical order, into table rows while it is being consumed. `book` is a
+    dict with 'order', 'name' and 'testament'; its order doubles as its id.
+    Book and chapter rows are complete once verse_rows() is exhausted.
+    """
+
+    def __init__(self, verses):
+        self._verses = verses
+        self.books = []     # [book dict, chapters_count]
+        self.chapters = []  # [id, book_id, chapter_number, verses_count]
+
+    def verse_rows(self):
+        """Yield (verse_key, id, book_id, chapter_id, chapter_number, verse_number, text)"""
+        book = chapter = None
+        verse_id = 0
+        for book_info, chapter_number, verse_number, text in self._verses:
+            if book is None or book[0] is not book_info:
+                book = [book_info, 0]
+                self.books.append(book)
+                chapter = None
+            if chapter is None or chapter[2] != chapter_number:
+                chapter = [len(self.chapters) + 1, book_info['order'], chapter_number, 0]
+                self.chapters.append(chapter)
+                book[1] += 1
+
+            chapter[3] += 1
+            verse_id += 1
+            yield (make_verse_key(book_info['order'], chapter_number, verse_number), verse_id,
+                   book_info['order'], chapter[0], chapter_number, verse_number, text)
+
+def load_scripture(conn, verses, version):
+    """
+    Replace books/chapters/verses (schema.py layout) with a stream of
+    (book, chapter_number, verse_number, text) tuples (see ScriptureRows).
+    Verses are inserted as they stream in, appended to the table B-tree in
+    verse_key order; nothing but the book and chapter rows is kept in memory.
+    Does not commit. Returns (rows inserted, seconds elapsed).
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    source = ScriptureRows(verses)
+
+    create_scripture_schema(cursor)
+    deferred = defer_indexes(cursor, ('books', 'chapters', 'verses'))
+
+    cursor.execute('DELETE FROM verses')
+    cursor.execute('DELETE FROM chapters')
+    cursor.execute('DELETE FROM books')
+    # Verse ids are renumbered, so digests from an earlier sync no longer apply
+    cursor.execute('DELETE FROM content_hashes')
+
+    rows = bulk_insert(cursor, 'verses',
+                       ('verse_key', 'id', 'book_id', 'chapter_number', 'verse_number', 'text', 'version'),
+                       ((key, verse_id, book_id, chapter_number, verse_number, text, version)
+                        for key, verse_id, book_id, _, chapter_number, verse_number, text in source.verse_rows()))
+    rows += bulk_insert(cursor, 'books',
+                        ('id', 'name', 'testament', 'book_order', 'chapters_count'),
+                        ((book['order'], book['name'], book['testament'], book['order'], chapters_count)
+                         for book, chapters_count in source.books))
+    rows += bulk_insert(cursor, 'chapters',
+                        ('id', 'book_id', 'chapter_number', 'verses_count'), source.chapters)
+
+    for sql in deferred:
+        cursor.execute(sql)
+    create_scripture_indexes(cursor)
+    rebuild_search_index(cursor)
+
+    return rows, time.perf_counter() - started
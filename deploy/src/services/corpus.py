@@ -0,0 +1,564 @@
+"""
+In-memory, read-only scripture corpus
+
+The Bible text never changes while the app runs, so chapter and verse reads
+are served from a Corpus loaded once from the scripture database instead of
+going through SQL. All verse text lives in one contiguous UTF-8 buffer and
+the book/chapter/verse structure in flat arrays, so when the corpus is
+loaded before gunicorn forks (preload_app) the workers share those pages
+copy-on-write: refcount updates only touch a handful of object headers,
+never the buffers themselves.
+
+The corpus can also be compiled into a versioned binary file (see
+write_file/from_file) that is mmap'ed at startup: the offset tables, lookup
+indexes and text are then sliced straight out of the page cache, so worker
+startup time and RSS no longer grow with the corpus, and several
+translations can be mapped side by side. The file is always compiled from
+the scripture database (after an import or sync), so ids, names and the
+digest match a database load exactly:
+
+    python -m src.services.corpus [src/bible.db] [src/corpus.bin]
+
+The header records the size and mtime of the database it was compiled
+from; open_corpus() ignores a file that no longer matches its database, or
+whose size or digest does not check out, and loads from the database.
+
+Reloading the database requires restarting the workers to pick up changes.
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.services.database import SCRIPTURE_DB_PATH
+from src.services.verse_key import make_verse_key
+
+CORPUS_FILE_PATH = Path(__file__).parent.parent / "corpus.bin"
+
+# Binary corpus layout (little-endian). The header (counts, section sizes,
+# digest, and the size / mtime of the source database) is followed by these
+# sections, each padded to a 4-byte boundary:
+#   metadata JSON (books, versions, ids_sorted)
+#   book_chapter_starts  u32 x (books + 1)
+#   chapter_books        u8  x chapters
+#   chapter_numbers      u16 x chapters
+#   chapter_starts       u32 x (chapters + 1)
+#   verse_ids            u32 x verses
+#   verse_keys           u32 x verses
+#   verse_numbers        u16 x verses
+#   verse_versions       u8  x verses
+#   text_offsets         u32 x (verses + 1)
+#   sorted_ids           u32 x verses (empty when ids_sorted)
+#   sorted_positions     u32 x verses (empty when ids_sorted)
+#   text                 UTF-8, text_size bytes
+# The digest is the SHA-256 of everything after the header.
+CORPUS_FILE_MAGIC = b'BIBLECRP'
+CORPUS_FILE_VERSION = 2
+CORPUS_FILE_HEADER = struct.Struct('<8sHHIIIII32sQq')
+
+def _padding(size):
+    return b'\0' * (-size % 4)
+
+def _padded(size):
+    return size + len(_padding(size))
+
+def database_stamp(db_path):
+    """(size, mtime in ns) of a database file; any write changes it"""
+    stat = os.stat(db_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _sorted_id_index(verse_ids):
+    """(sorted ids, their verse indexes), or (None, None) if ids are already ascending"""
+    if all(verse_ids[i] < verse_ids[i + 1] for i in range(len(verse_ids) - 1)):
+        return None, None
+    positions = sorted(range(len(verse_ids)), key=verse_ids.__getitem__)
+    return array('I', (verse_ids[i] for i in positions)), array('I', positions)
+
+class Corpus:
+    """Immutable scripture text packed into flat arrays"""
+
+    def __init__(self, books, chapter_books, chapter_numbers, chapter_starts, book_chapter_starts,
+                 verse_ids, verse_keys, verse_numbers, verse_versions, versions, text_offsets, text,
+                 sorted_ids=None, sorted_positions=None, digest=None):
+        # Only per-book work happens here: every per-chapter and per-verse
+        # table comes in ready-made (built by _from_rows or mapped from a file)
+
+        # books: tuple of dicts in canonical order (66 entries)
+        self.books = books
+        self._book_positions = {book['id']: position for position, book in enumerate(books)}
+        self._books_by_order = {book['order']: book for book in books}
+        # book position -> first chapter ordinal (len = books + 1)
+        self._book_chapter_starts = book_chapter_starts
+        # chapter ordinal -> book position, so navigation is plain indexing
+        self._chapter_books = chapter_books
+        # chapter ordinal -> chapter number / first verse index (len = chapters + 1)
+        self._chapter_numbers = chapter_numbers
+        self._chapter_starts = chapter_starts
+        # verse index -> database id, packed BBCCCVVV key (ascending),
+        # verse number, version, text slice
+        self._verse_ids = verse_ids
+        self._verse_keys = verse_keys
+        self._verse_numbers = verse_numbers
+        self._verse_versions = verse_versions
+        self._versions = versions
+        self._text_offsets = text_offsets
+        self._text = text
+        # Ids are normally assigned in canonical order; otherwise a sorted
+        # permutation keeps lookups by id a binary search
+        self._sorted_ids = verse_ids if sorted_ids is None else sorted_ids
+        self._sorted_positions = sorted_positions
+        # SHA-256 of the compiled form; identifies this build of the text
+        # (computed here unless it was read from a corpus file header)
+        self.digest = digest if digest is not None else hashlib.sha256(self._serialize()[1]).hexdigest()
+        # When the source was last written, for Last-Modified (see open_corpus)
+        self.modified_at = None
+        # database_stamp() of the database it was loaded from, if any
+        self.source_stamp = None
+
+    @classmethod
+    def from_database(cls, db_path=SCRIPTURE_DB_PATH):
+        """Load the whole corpus with two sequential reads"""
+        # Taken first, so a write during the load can only make it look stale
+        # (a missing database is left to sqlite3 to report)
+        stamp = database_stamp(db_path) if os.path.exists(db_path) else None
+        conn = sqlite3.connect(f'{Path(db_path).resolve().as_uri()}?mode=ro', uri=True)
+        try:
+            books = tuple(
+                {
+                    'id': row[0],
+                    'name': row[1],
+                    'testament': row[2],
+                    'order': row[3],
+                    'chapters_count': row[4]
+                }
+                for row in conn.execute('''
+                    SELECT id, name, testament, book_order, chapters_count
+                    FROM books
+                    ORDER BY book_order
+                ''')
+            )
+            # verse_key is the rowid, so this is a plain table scan, no sort
+            rows = conn.execute('''
+                SELECT book_id, chapter_number, verse_number, id, version, text
+                FROM verses
+                ORDER BY verse_key
+            ''')
+            corpus = cls._from_rows(books, rows)
+        finally:
+            conn.close()
+        corpus.source_stamp = stamp
+        return corpus
+
+    @classmethod
+    def _from_rows(cls, books, rows):
+        """Pack (book_id, chapter, verse, id, version, text) rows given in canonical order"""
+        book_positions = {book['id']: position for position, book in enumerate(books)}
+
+        chapter_books = array('B')
+        chapter_numbers = array('H')
+        chapter_starts = array('I')
+        verse_ids = array('I')
+        verse_keys = array('I')
+        verse_numbers = array('H')
+        verse_versions = array('B')
+        versions = {}
+        text_offsets = array('I', [0])
+        text = bytearray()
+
+        current_chapter = None
+        for book_id, chapter_number, verse_number, verse_id, version, verse_text in rows:
+            if (book_id, chapter_number) != current_chapter:
+                current_chapter = (book_id, chapter_number)
+                chapter_books.append(book_positions[book_id])
+                chapter_numbers.append(chapter_number)
+                chapter_starts.append(len(verse_ids))
+                chapter_key = make_verse_key(books[chapter_books[-1]]['order'], chapter_number, 0)
+
+            verse_ids.append(verse_id)
+            verse_keys.append(chapter_key + verse_number)
+            verse_numbers.append(verse_number)
+            verse_versions.append(versions.setdefault(version, len(versions)))
+            text.extend(verse_text.encode('utf-8'))
+            text_offsets.append(len(text))
+
+        chapter_starts.append(len(verse_ids))
+
+        # Chapters come grouped by book, so each book's range is a bisection
+        book_chapter_starts = array('I', (
+            bisect.bisect_left(chapter_books, position) for position in range(len(books) + 1)
+        ))
+
+        sorted_ids, sorted_positions = _sorted_id_index(verse_ids)
+
+        return cls(
+            books=books,
+            chapter_books=chapter_books,
+            chapter_numbers=chapter_numbers,
+            chapter_starts=chapter_starts,
+            book_chapter_starts=book_chapter_starts,
+            verse_ids=verse_ids,
+            verse_keys=verse_keys,
+            verse_numbers=verse_numbers,
+            verse_versions=verse_versions,
+            versions=tuple(versions),
+            text_offsets=text_offsets,
+            text=bytes(text),
+            sorted_ids=sorted_ids,
+            sorted_positions=sorted_positions
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Map a compiled corpus file. Tables and text stay in the mmap and are
+        read through memoryviews, so nothing is copied into the process.
+        Raises ValueError unless the file is complete and matches its digest.
+        """
+        if sys.byteorder != 'little':
+            raise ValueError('Compiled corpus files require a little-endian host')
+
+        with open(path, 'rb') as f:
+            # mmap itself raises ValueError for an empty file
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(mapped) < CORPUS_FILE_HEADER.size:
+            raise ValueError(f'{path} is truncated')
+        (magic, file_version, _reserved, book_count, chapter_count, verse_count,
+         meta_size, text_size, digest, source_size, source_mtime_ns) = CORPUS_FILE_HEADER.unpack_from(mapped, 0)
+        if magic != CORPUS_FILE_MAGIC:
+            raise ValueError(f'{path} is not a compiled corpus file')
+        if file_version != CORPUS_FILE_VERSION:
+            raise ValueError(f'{path} has corpus format {file_version}, expected {CORPUS_FILE_VERSION}')
+
+        view = memoryview(mapped)
+        # Nothing after the header is trusted, not even the metadata JSON,
+        # until it matches the digest
+        if hashlib.sha256(view[CORPUS_FILE_HEADER.size:]).digest() != digest:
+            raise ValueError(f'{path} does not match its digest')
+
+        offset = CORPUS_FILE_HEADER.size
+        if len(mapped) < offset + _padded(meta_size):
+            raise ValueError(f'{path} is truncated')
+        try:
+            metadata = json.loads(str(view[offset:offset + meta_size], 'utf-8'))
+            ids_sorted = bool(metadata['ids_sorted'])
+            books = tuple(metadata['books'])
+            versions = tuple(metadata['versions'])
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f'{path} has invalid metadata') from e
+        offset += _padded(meta_size)
+
+        index_count = 0 if ids_sorted else verse_count
+        sizes = [
+            ('book_chapter_starts', 4 * (book_count + 1), 'I'),
+            ('chapter_books', chapter_count, 'B'),
+            ('chapter_numbers', 2 * chapter_count, 'H'),
+            ('chapter_starts', 4 * (chapter_count + 1), 'I'),
+            ('verse_ids', 4 * verse_count, 'I'),
+            ('verse_keys', 4 * verse_count, 'I'),
+            ('verse_numbers', 2 * verse_count, 'H'),
+            ('verse_versions', verse_count, 'B'),
+            ('text_offsets', 4 * (verse_count + 1), 'I'),
+            ('sorted_ids', 4 * index_count, 'I'),
+            ('sorted_positions', 4 * index_count, 'I'),
+            ('text', text_size, None),
+        ]
+        expected_size = offset + sum(_padded(size) for _, size, _ in sizes)
+        if len(mapped) != expected_size:
+            raise ValueError(f'{path} is {len(mapped)} bytes, expected {expected_size}')
+
+        sections = {}
+        for name, size, fmt in sizes:
+            data = view[offset:offset + size]
+            sections[name] = data.cast(fmt) if fmt else data
+            offset += _padded(size)
+
+        if ids_sorted:
+            sections['sorted_ids'] = sections['sorted_positions'] = None
+        try:
+            corpus = cls(books=books, versions=versions, digest=digest.hex(), **sections)
+        except (KeyError, TypeError) as e:
+            # Books without the fields the indexes need
+            raise ValueError(f'{path} has invalid metadata') from e
+        corpus.source_stamp = (source_size, source_mtime_ns)
+        return corpus
+
+    def _serialize(self):
+        """(metadata, body) sections of the compiled format"""
+        ids_sorted = self._sorted_positions is None
+        metadata = json.dumps(
+            {'books': list(self.books), 'versions': list(self._versions), 'ids_sorted': ids_sorted},
+            ensure_ascii=False
+        ).encode('utf-8')
+
+        body = bytearray()
+        for data in (metadata, self._book_chapter_starts, self._chapter_books, self._chapter_numbers,
+                     self._chapter_starts, self._verse_ids, self._verse_keys, self._verse_numbers,
+                     self._verse_versions, self._text_offsets,
+                     b'' if ids_sorted else self._sorted_ids,
+                     b'' if ids_sorted else self._sorted_positions,
+                     self._text):
+            data = bytes(data) if isinstance(data, (bytes, bytearray)) else data.tobytes()
+            body.extend(data)
+            body.extend(_padding(len(data)))
+        return metadata, body
+
+    def write_file(self, path):
+        """Compile the corpus into the binary format read by from_file"""
+        if sys.byteorder != 'little':
+            raise ValueError('Compiled corpus files require a little-endian host')
+        if self.source_stamp is None:
+            raise ValueError('Only a corpus loaded from the database can be compiled')
+
+        metadata, body = self._serialize()
+        header = CORPUS_FILE_HEADER.pack(
+            CORPUS_FILE_MAGIC,
+            CORPUS_FILE_VERSION,
+            0,
+            len(self.books),
+            len(self._chapter_numbers),
+            len(self._verse_ids),
+            len(metadata),
+            len(self._text),
+            hashlib.sha256(body).digest(),
+            *self.source_stamp
+        )
+
+        # Write next to the target and swap it in, so running workers that
+        # still map the old file are never exposed to a half-written one
+        tmp_path = Path(f'{path}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    @property
+    def verse_count(self):
+        return len(self._verse_ids)
+
+    @property
+    def chapter_count(self):
+        return len(self._chapter_numbers)
+
+    @property
+    def verse_ids(self):
+        """Database ids of every verse, in canonical order"""
+        return self._verse_ids
+
+    def get_book(self, book_id):
+        """Book dict by id, or None"""
+        position = self._book_positions.get(book_id)
+        return None if position is None else self.books[position]
+
+    def get_book_by_order(self, order):
+        """Book dict by canonical order, or None"""
+        return self._books_by_order.get(order)
+
+    def _verse_text(self, index):
+        # str() decodes bytes and mmap-backed memoryviews alike
+        return str(self._text[self._text_offsets[index]:self._text_offsets[index + 1]], 'utf-8')
+
+    def chapter_ordinal(self, book_id, chapter_num):
+        """0-based position of a chapter in the whole Bible, or None"""
+        position = self._book_positions.get(book_id)
+        if position is None:
+            return None
+
+        low = self._book_chapter_starts[position]
+        high = self._book_chapter_starts[position + 1]
+
+        # Chapters are normally numbered 1..n, making this a direct index
+        ordinal = low + chapter_num - 1
+        if low <= ordinal < high and self._chapter_numbers[ordinal] == chapter_num:
+            return ordinal
+
+        ordinal = bisect.bisect_left(self._chapter_numbers, chapter_num, low, high)
+        if ordinal < high and self._chapter_numbers[ordinal] == chapter_num:
+            return ordinal
+        return None
+
+    def chapter_at(self, ordinal):
+        """(book, chapter_number) for a 0-based chapter ordinal, or None"""
+        if not 0 <= ordinal < len(self._chapter_numbers):
+            return None
+        return self.books[self._chapter_books[ordinal]], self._chapter_numbers[ordinal]
+
+    def chapter_link(self, ordinal):
+        """Navigation link to a chapter ordinal, or None if out of range"""
+        target = self.chapter_at(ordinal)
+        if target is None:
+            return None
+
+        book, chapter_number = target
+        return {
+            'book_id': book['id'],
+            'chapter': chapter_number,
+            'book_name': book['name'],
+            'ordinal': ordinal + 1,
+            'total': len(self._chapter_numbers)
+        }
+
+    def get_chapter_verses(self, book_id, chapter_num):
+        """[{'number', 'key', 'text'}, ...] for a chapter, or None if it does not exist"""
+        ordinal = self.chapter_ordinal(book_id, chapter_num)
+        if ordinal is None:
+            return None
+
+        chapter_key = make_verse_key(self.get_book(book_id)['order'], chapter_num, 0)
+        return [
+            {
+                'number': self._verse_numbers[index],
+                'key': chapter_key + self._verse_numbers[index],
+                'text': self._verse_text(index)
+            }
+            for index in range(self._chapter_starts[ordinal], self._chapter_starts[ordinal + 1])
+        ]
+
+    def chapter_last_verse(self, book_id, chapter_num):
+        """Highest verse number of a chapter, or None if it does not exist"""
+        ordinal = self.chapter_ordinal(book_id, chapter_num)
+        if ordinal is None:
+            return None
+        return self._verse_numbers[self._chapter_starts[ordinal + 1] - 1]
+
+    def get_verse(self, verse_id):
+        """Verse by database id in the /verses/<id> response shape, or None"""
+        position = bisect.bisect_left(self._sorted_ids, verse_id)
+        if position >= len(self._sorted_ids) or self._sorted_ids[position] != verse_id:
+            return None
+        index = position if self._sorted_positions is None else self._sorted_positions[position]
+
+        ordinal = bisect.bisect_right(self._chapter_starts, index) - 1
+        return self._verse_data(index, ordinal)
+
+    def get_key_range(self, first_key, last_key, limit=None):
+        """
+        Verses with first_key <= verse_key <= last_key in the /verses/<id>
+        response shape, the first `limit` of them if given
+        """
+        start = bisect.bisect_left(self._verse_keys, first_key)
+        end = bisect.bisect_right(self._verse_keys, last_key)
+        if limit is not None:
+            end = min(end, start + max(limit, 0))
+        if start >= end:
+            return []
+
+        ordinal = bisect.bisect_right(self._chapter_starts, start) - 1
+        verses = []
+        for index in range(start, end):
+            while index >= self._chapter_starts[ordinal + 1]:
+                ordinal += 1
+            verses.append(self._verse_data(index, ordinal))
+        return verses
+
+    def _verse_data(self, index, ordinal):
+        book = self.books[self._chapter_books[ordinal]]
+        chapter_number = self._chapter_numbers[ordinal]
+        verse_number = self._verse_numbers[index]
+
+        return {
+            'id': self._verse_ids[index],
+            'key': make_verse_key(book['order'], chapter_number, verse_number),
+            'book': {
+                'id': book['id'],
+                'name': book['name'],
+                'testament': book['testament']
+            },
+            'chapter': chapter_number,
+            'verse': verse_number,
+            'text': self._verse_text(index),
+            'version': self._versions[self._verse_versions[index]],
+            'reference': f"{book['name']} {chapter_number}:{verse_number}"
+        }
+
+    def get_navigation(self, book_id, chapter_num):
+        """Previous/next chapter links, crossing book boundaries"""
+        navigation = {
+            'previous': None,
+            'next': None
+        }
+
+        ordinal = self.chapter_ordinal(book_id, chapter_num)
+        if ordinal is None:
+            return navigation
+
+        for key, neighbour in (('previous', ordinal - 1), ('next', ordinal + 1)):
+            target = self.chapter_at(neighbour)
+            if target is None:
+                continue
+
+            book, chapter_number = target
+            navigation[key] = {
+                'book_id': book['id'],
+                'chapter': chapter_number
+            }
+            # Name the book only when the link leaves the current one
+            if book['id'] != book_id:
+                navigation[key]['book_name'] = book['name']
+
+        return navigation
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+def open_corpus():
+    """
+    Map the compiled corpus file if it is intact and was compiled from the
+    current database, else load from the database
+    """
+    source = SCRIPTURE_DB_PATH
+    corpus = None
+    if CORPUS_FILE_PATH.exists():
+        try:
+            compiled = Corpus.from_file(CORPUS_FILE_PATH)
+        except ValueError:
+            compiled = None  # damaged or from an older format; the database has the text
+        # A file without its database is used as is (e.g. a read-only deployment)
+        if compiled and (not SCRIPTURE_DB_PATH.exists()
+                         or compiled.source_stamp == database_stamp(SCRIPTURE_DB_PATH)):
+            source, corpus = CORPUS_FILE_PATH, compiled
+
+    if corpus is None:
+        corpus = Corpus.from_database(source)
+
+    corpus.modified_at = datetime.fromtimestamp(int(os.stat(source).st_mtime), timezone.utc)
+    return corpus
+
+def load_corpus():
+    """(Re)load the process-wide corpus; call before forking workers"""
+    global _corpus
+    corpus = open_corpus()
+    with _corpus_lock:
+        _corpus = corpus
+    return corpus
+
+def get_corpus():
+    """Process-wide corpus, loaded on first use if it was not preloaded"""
+    global _corpus
+    if _corpus is None:
+        with _corpus_lock:
+            if _corpus is None:
+                _corpus = open_corpus()
+    return _corpus
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compila o texto bíblico do banco no formato binário mapeado em memória')
+    parser.add_argument('database', nargs='?', default=str(SCRIPTURE_DB_PATH), help='banco SQLite das escrituras')
+    parser.add_argument('output', nargs='?', default=str(CORPUS_FILE_PATH), help='arquivo de saída')
+    args = parser.parse_args()
+
+    corpus = Corpus.from_database(args.database)
+    corpus.write_file(args.output)
+
+    compiled = Corpus.from_file(args.output)
+    print(f"✅ {compiled.verse_count} versículos compilados em {args.output}")
+    print(f"🔑 SHA-256: {compiled.digest}")
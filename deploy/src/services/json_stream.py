@@ -0,0 +1,112 @@
+"""
+Incremental reader for large JSON arrays
+
+The scripture sources are one big JSON array of books (or an object holding
+one). json.load would materialize every book before the first insert; this
+reader decodes one array element at a time from a small rolling buffer, so
+peak memory is bounded by the largest element (a single book) rather than
+by the file.
+"""
+import json
+
+CHUNK_SIZE = 64 * 1024  # characters read per refill
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r\ufeff'
+# Characters that can continue a JSON number
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+class _Buffer:
+    """Rolling text buffer over a file object"""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Drop consumed text and read more input; False at end of file"""
+        if self.eof:
+            return False
+        # Grow reads with the pending text so re-decoding a large element
+        # after each refill stays linear overall
+        chunk = self.fp.read(max(self.chunk_size, len(self.text) - self.pos))
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or '' at end of file"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} at character {self.pos} of the JSON buffer')
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A value may continue in the next chunk if it ends at the buffer
+            # end, or is a number cut short there ('1' of '1.5', '2' of '2e3')
+            if self._may_continue(value, end) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def _may_continue(self, value, end):
+        if end == len(self.text):
+            return True
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False
+        # Only number characters up to the buffer end: no delimiter seen yet
+        while end < len(self.text) and self.text[end] in _NUMBER_CHARS:
+            end += 1
+        return end == len(self.text)
+
+def iter_json_array(fp, key=None):
+    """
+    Yield the elements of a JSON array one by one.
+    The array is the whole document, or the value of `key` in the top-level
+    object (other top-level values are decoded and discarded).
+    Raises ValueError on malformed input.
+    """
+    buffer = _Buffer(fp, CHUNK_SIZE)
+
+    if key is not None:
+        buffer.expect('{')
+        while True:
+            name = buffer.decode()
+            buffer.expect(':')
+            if name == key:
+                break
+            buffer.decode()
+            if buffer.peek() != ',':
+                raise ValueError(f'Key {key!r} not found in JSON object')
+            buffer.expect(',')
+
+    buffer.expect('[')
+    if buffer.peek() == ']':
+        return
+
+    while True:
+        yield buffer.decode()
+        if buffer.peek() == ']':
+            return
+        buffer.expect(',')
@@ -0,0 +1,70 @@
+"""
+Opaque cursors for keyset pagination
+
+A cursor is the sort key of the last row of a page, serialized as URL-safe
+base64 JSON. The next page is fetched with "WHERE (sort key) > (cursor)"
+instead of OFFSET, so every page costs the same index seek as the first one.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+# Largest page a listing returns, whatever 'limit' asks for
+MAX_PAGE_SIZE = 1000
+
+def clamp_limit(limit, maximum=MAX_PAGE_SIZE):
+    """Page size clamped to 1..maximum, so every page can end with a cursor row"""
+    return max(1, min(limit, maximum))
+
+def encode_cursor(values):
+    """Encode the sort key of the last row of a page as an opaque token"""
+    payload = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token, types):
+    """
+    Decode a token produced by encode_cursor. `types` holds the accepted
+    type (or tuple of types, as for isinstance) of each value in order.
+    Raises ValueError if the token is malformed or its values do not match.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError('Invalid cursor')
+    for value, expected in zip(values, types):
+        # JSON true/false would pass as int
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError('Invalid cursor')
+
+    return values
+
+def split_page(rows, limit):
+    """
+    Split the result of a LIMIT limit+1 query into (page_rows, has_more).
+    Fetching one extra row tells whether another page exists without COUNT(*).
+    """
+    return rows[:limit], len(rows) > limit
+
+def encode_newest_first_cursor(row):
+    """Cursor for listings ordered by (created_at DESC, id DESC)"""
+    return encode_cursor([row.created_at.isoformat(), row.id])
+
+def apply_newest_first_cursor(query, model, token):
+    """
+    Restrict a (created_at DESC, id DESC) ORM query to the rows that come
+    after the cursor. Raises ValueError for malformed cursors.
+    """
+    created_at, row_id = decode_cursor(token, (str, int))
+    try:
+        created_at = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    return query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
@@ -0,0 +1,168 @@
+"""
+Bible references
+
+parse_reference() turns compound references into canonical verse ranges:
+
+    'João 3:16'              one verse
+    'Gênesis 1:1-3'          verses of a chapter ('Gn 1.1-3' also works)
+    'Salmos 23'              a whole chapter
+    'Jo 3:16-18; 4:1-3'      ';' separates chapters, the book carries over
+    'Jo 3:16, 18, 20-21'     ',' lists verses of the current chapter
+    'Sl 23; 91' / 'Sl 1-3'   chapter lists and chapter ranges
+    'Rm 8:28-9:5'            ranges crossing chapters
+    'Gn 50:22 - Ex 2:10'     ranges crossing books (both named)
+    'Jo 3:16; Rm 8:28'       a segment may name a new book
+
+Each range becomes one contiguous verse_key range (see verse_key.py), so a
+whole reference is fetched with a single range-scan query. Resolving a
+reference against the in-memory corpus needs no database round trip.
+"""
+import re
+
+from src.services.book_names import resolve_book_order
+from src.services.verse_key import make_verse_key
+
+# Optional book name (may start with 1-3, as in '1 Coríntios'), then numbers
+SEGMENT_PATTERN = re.compile(r'^(?:((?:[1-3]\s*)?[^\W\d_][^\d]*?)\s*)?(\d[\d\s:.,\-–]*)?$')
+# C, C:V, C-C, C:V-V, C:V-C:V (':' or '.' between chapter and verse)
+ITEM_PATTERN = re.compile(r'^(\d{1,3})(?:[:.](\d{1,3}))?(?:[-–](\d{1,3})(?:[:.](\d{1,3}))?)?$')
+# Start segment, then '-' and a book with a chapter or chapter:verse
+CROSS_BOOK_PATTERN = re.compile(
+    r'^(.*?\d)\s*[-–]\s*((?:[1-3]\s*)?[^\W\d_][^\d]*?)\s*(\d{1,3})(?:[:.](\d{1,3}))?$'
+)
+
+def _parse_item(item, chapter):
+    """
+    ((start_chapter, start_verse), (end_chapter, end_verse)) of one
+    comma-separated item; `chapter` is set when the previous item named
+    verses, making a bare number a verse of that chapter. None if invalid.
+    """
+    match = ITEM_PATTERN.match(re.sub(r'\s+', '', item))
+    if not match:
+        return None
+    a, b, c, d = (int(group) if group else None for group in match.groups())
+
+    if b is None and chapter is not None:
+        # Verse (range) of the current chapter: '18', '20-21', '20-4:2'
+        start = (chapter, a)
+        end = (c, d) if d is not None else (chapter, c if c is not None else a)
+    elif b is None:
+        # Chapter (range): '23', '1-3', '3-4:5'
+        start = (a, None)
+        end = (c, d) if c is not None else (a, None)
+    else:
+        # Verse (range) with its chapter: '3:16', '3:16-18', '8:28-9:5'
+        start = (a, b)
+        end = (c, d) if d is not None else (a, c if c is not None else b)
+
+    # A missing verse means the start / end of the chapter
+    if (start[0], start[1] or 0) > (end[0], 999 if end[1] is None else end[1]):
+        return None
+    return start, end
+
+def _parse_cross_book(segment, book_name):
+    """
+    (book_name, start_chapter, start_verse, end_chapter, end_verse, end_book_name)
+    of a 'Gn 50:22 - Ex 2:10' segment (the first book may carry over), or None
+    """
+    match = CROSS_BOOK_PATTERN.match(segment)
+    if not match:
+        return None
+    start_segment, end_book_name, end_chapter, end_verse = match.groups()
+
+    start = SEGMENT_PATTERN.match(start_segment)
+    if not start or not start.group(2):
+        return None
+    book_name = start.group(1).rstrip(' .') if start.group(1) else book_name
+    item = ITEM_PATTERN.match(re.sub(r'\s+', '', start.group(2)))
+    # The start is a single chapter or verse: 'Gn 50' or 'Gn 50:22'
+    if not book_name or not item or item.group(3) is not None:
+        return None
+
+    return (
+        book_name, int(item.group(1)), int(item.group(2)) if item.group(2) else None,
+        int(end_chapter), int(end_verse) if end_verse else None, end_book_name.rstrip(' .')
+    )
+
+def parse_reference(reference):
+    """
+    Parse a (compound) Bible reference into
+    [(book_name, start_chapter, start_verse, end_chapter, end_verse, end_book_name), ...]
+    in input order, where a None verse means the start / end of the chapter
+    and end_book_name is book_name unless the range crosses books.
+    Returns None unless the whole input parses and names a book first.
+    """
+    ranges = []
+    book_name = None
+
+    for segment in reference.split(';'):
+        segment = segment.strip()
+        cross_book = _parse_cross_book(segment, book_name)
+        if cross_book:
+            ranges.append(cross_book)
+            book_name = cross_book[-1]
+            continue
+
+        match = SEGMENT_PATTERN.match(segment)
+        if not match or not match.group(2):
+            return None
+        if match.group(1):
+            book_name = match.group(1).rstrip(' .')
+        if not book_name:
+            return None
+
+        chapter = None
+        for item in match.group(2).split(','):
+            parsed = _parse_item(item, chapter)
+            if parsed is None:
+                return None
+            (start_chapter, start_verse), (end_chapter, end_verse) = parsed
+            ranges.append((book_name, start_chapter, start_verse, end_chapter, end_verse, book_name))
+            # Later bare numbers are verses only after an item that named verses
+            chapter = end_chapter if end_verse is not None else None
+
+    return ranges
+
+def range_key_range(parsed_range, resolve=resolve_book_order):
+    """
+    Inclusive (first, last) verse keys of one parsed range, or None if a
+    book does not resolve or the end comes before the start
+    """
+    book_name, start_chapter, start_verse, end_chapter, end_verse, end_book_name = parsed_range
+    order = resolve(book_name)
+    end_order = order if end_book_name == book_name else resolve(end_book_name)
+    if order is None or end_order is None:
+        return None
+
+    first = make_verse_key(order, start_chapter, start_verse or 0)
+    last = make_verse_key(end_order, end_chapter, 999 if end_verse is None else end_verse)
+    return (first, last) if first <= last else None
+
+def reference_key_ranges(ranges, resolve=resolve_book_order):
+    """verse_key ranges of parsed reference ranges, or None if any does not resolve"""
+    key_ranges = [range_key_range(parsed_range, resolve) for parsed_range in ranges]
+    return None if None in key_ranges else key_ranges
+
+def unresolved_book(ranges, resolve=resolve_book_order):
+    """First book name in parsed ranges that does not resolve, or None"""
+    for book_name, *_, end_book_name in ranges:
+        for name in (book_name, end_book_name):
+            if resolve(name) is None:
+                return name
+    return None
+
+def resolve_reference(corpus, reference, limit=None):
+    """
+    Verses of a (compound) reference in the /verses/<id> shape, in input
+    order; ranges whose book is unknown are skipped, [] if it does not parse.
+    With a limit, at most limit verses are returned.
+    """
+    verses = []
+    for parsed_range in parse_reference(reference) or []:
+        key_range = range_key_range(parsed_range)
+        if key_range:
+            remaining = None if limit is None else limit - len(verses)
+            verses.extend(corpus.get_key_range(*key_range, limit=remaining))
+            if limit is not None and len(verses) >= limit:
+                break
+    return verses
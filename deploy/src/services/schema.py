@@ -0,0 +1,72 @@
+"""
+Schema of the scripture database read by routes/bible.py and routes/search.py
+
+Verses are stored in a rowid table whose INTEGER PRIMARY KEY is the packed
+verse key (see verse_key.py), so the table B-tree itself is clustered in
+canonical order and verse ranges are contiguous range scans. The public
+verse id stays a separate UNIQUE column: annotations and the API refer to it.
+"""
+
+def has_legacy_verses(cursor):
+    """Whether a verses table exists from before verse keys"""
+    cursor.execute("SELECT name FROM pragma_table_info('verses')")
+    columns = {row[0] for row in cursor.fetchall()}
+    return bool(columns) and 'verse_key' not in columns
+
+def create_scripture_schema(cursor):
+    """
+    Create books/chapters/verses if they do not exist (full loads only).
+    A verses table from before verse keys is dropped, since a full load
+    reloads every verse anyway; sync_scripture refuses such a database.
+    """
+    if has_legacy_verses(cursor):
+        cursor.execute('DROP TABLE verses')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            testament TEXT NOT NULL,
+            book_order INTEGER NOT NULL,
+            chapters_count INTEGER NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chapters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            chapter_number INTEGER NOT NULL,
+            verses_count INTEGER NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS verses (
+            verse_key INTEGER PRIMARY KEY,  -- BBCCCVVV
+            id INTEGER NOT NULL UNIQUE,
+            book_id INTEGER NOT NULL,
+            chapter_number INTEGER NOT NULL,
+            verse_number INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            version TEXT,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+
+    # Content digests written by the incremental sync (scripture_sync.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS content_hashes (
+            book_id INTEGER NOT NULL,
+            chapter_number INTEGER NOT NULL,  -- 0 = the whole book
+            digest TEXT NOT NULL,
+            PRIMARY KEY (book_id, chapter_number)
+        )
+    ''')
+
+def create_scripture_indexes(cursor):
+    """Secondary indexes; verse ranges use the verse_key primary key instead"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_books_order ON books (book_order)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chapters_book ON chapters (book_id, chapter_number)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verses_book_chapter ON verses (book_id, chapter_number)')
@@ -1,3 +1,5 @@
+import gc
+
 # Gunicorn configuration file for Bible-BE
 
 # Server socket
@@ -15,6 +17,10 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 50
 
+# Import the app (and its in-memory scripture corpus) once in the master;
+# workers then share those pages copy-on-write instead of each loading a copy
+preload_app = True
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -35,3 +41,18 @@ tmp_upload_dir = None
 keyfile = None
 certfile = None
 
+
+# Server hooks
+def when_ready(server):
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers do not write to (and un-share) the preloaded pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Drop any pooled ORM connection inherited from the master (main.py
+    # disposes its own after schema setup); close=False leaves the master's
+    # handles to the master
+    from src.main import app
+    from src.models.bible import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,108 @@
+"""
+Pooled read-only SQLite connections for the scripture database
+
+Opening a connection per request throws away SQLite's page cache every time.
+Each worker instead keeps a small pool of read-only connections, tuned once
+with READ_PRAGMAS, and lends one to each request through flask.g.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+from flask import g
+
+SCRIPTURE_DB_PATH = Path(__file__).parent.parent / "bible.db"
+
+# Idle connections kept per worker; extra connections opened under load
+# are closed when returned
+POOL_SIZE = 4
+
+READ_PRAGMAS = {
+    'query_only': 'ON',
+    'mmap_size': 256 * 1024 * 1024,  # bytes; shared page-cache-backed reads
+    'cache_size': -16 * 1024,        # negative = KiB instead of pages
+    'temp_store': 'MEMORY',
+}
+
+class ConnectionPool:
+    """LIFO pool of read-only connections, rebuilt if the process forks"""
+
+    def __init__(self, db_path, size=POOL_SIZE, pragmas=None):
+        self.db_path = Path(db_path).resolve()
+        self.size = size
+        self.pragmas = READ_PRAGMAS if pragmas is None else pragmas
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Connections inherited from a parent process must not be used or
+        # closed by the child, so they are simply dropped
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            f'{self.db_path.as_uri()}?mode=ro',
+            uri=True,
+            check_same_thread=False  # the pool hands each connection to one request at a time
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self):
+        """Take a warm connection from the pool, or open a new one"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        """Give a connection back to the pool"""
+        if self._pid != os.getpid():
+            return
+
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Process-wide pool for the scripture database"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(SCRIPTURE_DB_PATH)
+    return _pool
+
+def get_db_connection():
+    """Get the read-only scripture connection lent to the current request"""
+    if 'scripture_db' not in g:
+        g.scripture_db = get_pool().acquire()
+    return g.scripture_db
+
+def release_db_connection(exception=None):
+    """Return the request's connection to the pool (teardown handler)"""
+    conn = g.pop('scripture_db', None)
+    if conn is not None:
+        get_pool().release(conn)
@@ -0,0 +1,94 @@
+"""
+Conditional GET for scripture responses
+
+Scripture responses only change when a new corpus is built, so each one is
+identified by a strong ETag derived from the corpus digest and the request
+URL. Once the view has answered 200 (so the resource exists), a matching
+If-None-Match or an If-Modified-Since no older than the corpus source turns
+the response into a bodiless 304. Corpus views are in-memory lookups, so
+running them first costs little. Successful responses carry a long
+Cache-Control lifetime for browsers and the reverse proxy.
+
+Views that serve pre-compressed bodies declare their content codings
+(corpus_cached(encodings=...)); the negotiated coding is then part of the
+ETag and responses carry Vary: Accept-Encoding.
+"""
+import hashlib
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+from src.services.corpus import get_corpus
+
+# Seconds a client or proxy may reuse a response without revalidating
+CACHE_MAX_AGE = 24 * 60 * 60
+
+def resource_etag(corpus, key):
+    """Strong ETag value for a resource key under a corpus build"""
+    return hashlib.sha256(f'{corpus.digest}:{key}'.encode('utf-8')).hexdigest()[:32]
+
+def _apply_cache_headers(response, etag, corpus):
+    response.set_etag(etag)
+    if corpus.modified_at is not None:
+        response.last_modified = corpus.modified_at
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response
+
+def _is_fresh(etag, corpus):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and corpus.modified_at is not None:
+        return corpus.modified_at <= request.if_modified_since
+    return False
+
+def negotiate_encoding(encodings):
+    """
+    Content coding to send, out of `encodings` (most preferred first), for
+    the request's Accept-Encoding; 'identity' if none of them is acceptable
+    """
+    best, best_quality = 'identity', 0
+    for encoding in encodings:
+        quality = request.accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def corpus_cached(view=None, *, encodings=()):
+    """
+    Serve a corpus-backed GET view with ETag/Last-Modified validation.
+    With `encodings`, the view picks its body by negotiate_encoding(encodings).
+    """
+    if view is None:
+        return lambda view: corpus_cached(view, encodings=encodings)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            corpus = get_corpus()
+        except Exception as e:
+            # No corpus to validate against; fail like the views themselves
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+        # The full path includes the query string, which can change the body
+        key = request.full_path
+        if encodings:
+            # Each content coding is a different representation
+            key = f'{key}:{negotiate_encoding(encodings)}'
+        etag = resource_etag(corpus, key)
+
+        response = make_response(view(*args, **kwargs))
+        # Errors (404 for a missing book...) are returned as they are
+        if response.status_code == 200:
+            if _is_fresh(etag, corpus):
+                response = make_response('', 304)
+            _apply_cache_headers(response, etag, corpus)
+
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    return wrapper
@@ -0,0 +1,85 @@
+"""
+Query planning for /search/quick
+
+The input is classified once into one of three plans:
+
+    reference   'Jo 3:16-18; 4:1'        verse_key range scan
+                'Gn 1 - Ap 22'
+    mixed       'amor em 1 Coríntios'    full-text search restricted to the
+                'fé Hebreus 11'          verse_key ranges of a book/reference
+    text        'amor ao próximo'        full-text search
+
+A mixed query is text followed by a reference ('fé Hebreus 11'), or by a
+connector and a book name ('amor em 1 Coríntios'). Inside a longer query,
+book names must match a name or abbreviation exactly (accents aside), so
+'fé em Deus' stays a text search instead of Deuteronômio and 'fé Hebreus'
+is not read as one misspelled book. Partial and fuzzy names ('Genesys 1')
+are only tried once the whole input has failed as a mixed query. The plan
+is returned in the response for diagnostics.
+"""
+from src.services.book_names import lookup_book_order
+from src.services.references import parse_reference, reference_key_ranges
+from src.services.verse_key import book_key_range
+
+PLAN_REFERENCE = 'reference'
+PLAN_MIXED = 'mixed'
+PLAN_TEXT = 'text'
+
+# Words that introduce a book scope after the search text
+SCOPE_CONNECTORS = {'em', 'no', 'na', 'nos', 'nas', 'in'}
+
+def _scope_key_ranges(words, after_connector):
+    """verse_key ranges of a trailing scope, or None if it is not one"""
+    scope = ' '.join(words)
+    ranges = parse_reference(scope)
+    if ranges:
+        return reference_key_ranges(ranges, lookup_book_order)
+    if after_connector:
+        order = lookup_book_order(scope)
+        if order is not None:
+            return [book_key_range(order)]
+    return None
+
+def plan_query(query):
+    """
+    Classify a quick-search query. Returns a dict with 'type' and, depending
+    on it: 'ranges' (parsed, for a reference), 'text' (text and mixed),
+    'scope' (mixed) and 'key_ranges' (reference and mixed).
+    """
+    query = query.strip()
+
+    ranges = parse_reference(query)
+    key_ranges = ranges and reference_key_ranges(ranges, lookup_book_order)
+    if key_ranges:
+        return {'type': PLAN_REFERENCE, 'ranges': ranges, 'key_ranges': key_ranges}
+
+    # Longest trailing scope first: 'amor em 1 Coríntios' before 'Coríntios'
+    words = query.split()
+    for split in range(1, len(words)):
+        text, rest = words[:split], words[split:]
+        after_connector = rest[0].casefold() in SCOPE_CONNECTORS
+        scope = rest[1:] if after_connector else rest
+        if not scope:
+            continue
+
+        key_ranges = _scope_key_ranges(scope, after_connector)
+        if key_ranges:
+            return {
+                'type': PLAN_MIXED,
+                'text': ' '.join(text),
+                'scope': ' '.join(scope),
+                'key_ranges': key_ranges
+            }
+
+    key_ranges = ranges and reference_key_ranges(ranges)
+    if key_ranges:
+        return {'type': PLAN_REFERENCE, 'ranges': ranges, 'key_ranges': key_ranges}
+
+    return {'type': PLAN_TEXT, 'text': query}
+
+def describe_plan(plan):
+    """JSON-friendly summary of a plan for the response"""
+    description = {key: value for key, value in plan.items() if key in ('type', 'text', 'scope')}
+    if 'key_ranges' in plan:
+        description['ranges'] = [{'start': first, 'end': last} for first, last in plan['key_ranges']]
+    return description
@@ -0,0 +1,196 @@
+"""
+Incremental re-import of a translation
+
+Instead of deleting and reloading everything, sync_scripture() diffs the
+source against the database and only writes what changed, in a single
+transaction. Each book and chapter is hashed and the digests are kept in
+content_hashes, so unchanged books are skipped without reading them back.
+A changed chapter is compared verse by verse through its verse_key range.
+
+Verse ids of existing verses never change, so annotations pointing at them
+survive a text correction. New verses get ids after the current maximum.
+Books are identified by their canonical order, as load_scripture assigns them.
+A database whose verses predate verse keys cannot be synced: recreating the
+table would renumber the ids, so it needs a full load (load_scripture) first.
+"""
+import hashlib
+import json
+import time
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+from src.services.schema import (
+    create_scripture_schema, create_scripture_indexes, has_legacy_verses
+)
+from src.services.search_index import (
+    has_search_index, rebuild_search_index, index_verse, unindex_verse
+)
+from src.services.verse_key import make_verse_key, chapter_key_range, book_key_range
+
+def _digest(value):
+    payload = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _delete_verses(cursor, first_key, last_key, indexed, stats):
+    cursor.execute(
+        'SELECT id, text FROM verses WHERE verse_key BETWEEN ? AND ?',
+        (first_key, last_key)
+    )
+    removed = cursor.fetchall()
+    if indexed:
+        for verse_id, text in removed:
+            unindex_verse(cursor, verse_id, text)
+    cursor.execute('DELETE FROM verses WHERE verse_key BETWEEN ? AND ?', (first_key, last_key))
+    stats['deleted'] += len(removed)
+
+def _sync_chapter(cursor, book_id, chapter_number, verses, version, next_id, indexed, stats):
+    """Apply one chapter's [(verse_number, text), ...]; returns the next free verse id"""
+    first_key, last_key = chapter_key_range(book_id, chapter_number)
+    cursor.execute('''
+        SELECT verse_key, id, text, version FROM verses
+        WHERE verse_key BETWEEN ? AND ?
+    ''', (first_key, last_key))
+    existing = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    for verse_number, text in verses:
+        key = make_verse_key(book_id, chapter_number, verse_number)
+        current = existing.pop(key, None)
+
+        if current is None:
+            cursor.execute('''
+                INSERT INTO verses (verse_key, id, book_id, chapter_number, verse_number, text, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, next_id, book_id, chapter_number, verse_number, text, version))
+            if indexed:
+                index_verse(cursor, next_id, text)
+            next_id += 1
+            stats['inserted'] += 1
+
+        elif current[1:] != (text, version):
+            verse_id, old_text, _ = current
+            cursor.execute(
+                'UPDATE verses SET text = ?, version = ? WHERE verse_key = ?',
+                (text, version, key)
+            )
+            if indexed:
+                unindex_verse(cursor, verse_id, old_text)
+                index_verse(cursor, verse_id, text)
+            stats['updated'] += 1
+
+    # Verses no longer present in the source
+    for key in existing:
+        _delete_verses(cursor, key, key, indexed, stats)
+
+    cursor.execute('''
+        UPDATE chapters SET verses_count = ?
+        WHERE book_id = ? AND chapter_number = ?
+    ''', (len(verses), book_id, chapter_number))
+    if cursor.rowcount == 0:
+        cursor.execute('''
+            INSERT INTO chapters (book_id, chapter_number, verses_count)
+            VALUES (?, ?, ?)
+        ''', (book_id, chapter_number, len(verses)))
+
+    return next_id
+
+def _delete_chapters(cursor, book_id, chapter_numbers, indexed, stats):
+    for chapter_number in chapter_numbers:
+        _delete_verses(cursor, *chapter_key_range(book_id, chapter_number), indexed, stats)
+        cursor.execute(
+            'DELETE FROM chapters WHERE book_id = ? AND chapter_number = ?',
+            (book_id, chapter_number)
+        )
+        cursor.execute(
+            'DELETE FROM content_hashes WHERE book_id = ? AND chapter_number = ?',
+            (book_id, chapter_number)
+        )
+
+def sync_scripture(conn, verses, version):
+    """
+    Bring books/chapters/verses in line with a stream of
+    (book, chapter_number, verse_number, text) tuples, in canonical order
+    (see bulk_import.ScriptureRows), writing only the rows that changed.
+    Does not commit. Returns a Counter of inserted/updated/deleted verses and
+    unchanged/changed/deleted books, plus the elapsed 'seconds'.
+    Raises ValueError if the verses table predates verse keys.
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    stats = Counter()
+
+    if has_legacy_verses(cursor):
+        raise ValueError('Verses table predates verse_key; run a full load instead of a sync')
+
+    create_scripture_schema(cursor)
+    create_scripture_indexes(cursor)
+    indexed = has_search_index(cursor)
+
+    cursor.execute('SELECT book_id, chapter_number, digest FROM content_hashes')
+    stored = {(book_id, chapter_number): digest for book_id, chapter_number, digest in cursor.fetchall()}
+
+    cursor.execute('SELECT MAX(id) FROM verses')
+    next_id = (cursor.fetchone()[0] or 0) + 1
+
+    seen_books = set()
+    for book_id, book_rows in groupby(verses, key=lambda row: row[0]['order']):
+        # One book at a time is held in memory
+        book_rows = list(book_rows)
+        book = book_rows[0][0]
+        seen_books.add(book_id)
+
+        chapters = [
+            (chapter_number, [(verse_number, text) for _, _, verse_number, text in rows])
+            for chapter_number, rows in groupby(book_rows, key=itemgetter(1))
+        ]
+        chapter_digests = {
+            chapter_number: _digest([version, chapter_verses])
+            for chapter_number, chapter_verses in chapters
+        }
+        book_digest = _digest([book['name'], book['testament'], sorted(chapter_digests.items())])
+
+        if stored.get((book_id, 0)) == book_digest:
+            stats['books_unchanged'] += 1
+            continue
+        stats['books_changed'] += 1
+
+        cursor.execute('''
+            INSERT INTO books (id, name, testament, book_order, chapters_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                name = excluded.name,
+                testament = excluded.testament,
+                book_order = excluded.book_order,
+                chapters_count = excluded.chapters_count
+        ''', (book_id, book['name'], book['testament'], book_id, len(chapters)))
+
+        for chapter_number, chapter_verses in chapters:
+            if stored.get((book_id, chapter_number)) != chapter_digests[chapter_number]:
+                next_id = _sync_chapter(cursor, book_id, chapter_number, chapter_verses,
+                                        version, next_id, indexed, stats)
+
+        cursor.execute('SELECT chapter_number FROM chapters WHERE book_id = ?', (book_id,))
+        dropped = {row[0] for row in cursor.fetchall()} - chapter_digests.keys()
+        _delete_chapters(cursor, book_id, dropped, indexed, stats)
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO content_hashes (book_id, chapter_number, digest)
+            VALUES (?, ?, ?)
+        ''', [(book_id, 0, book_digest)] + [
+            (book_id, chapter_number, digest) for chapter_number, digest in chapter_digests.items()
+        ])
+
+    # Books no longer present in the source
+    cursor.execute('SELECT id FROM books')
+    for book_id in {row[0] for row in cursor.fetchall()} - seen_books:
+        _delete_verses(cursor, *book_key_range(book_id), indexed, stats)
+        for table in ('chapters', 'content_hashes'):
+            cursor.execute(f'DELETE FROM {table} WHERE book_id = ?', (book_id,))
+        cursor.execute('DELETE FROM books WHERE id = ?', (book_id,))
+        stats['books_deleted'] += 1
+
+    if not indexed:
+        rebuild_search_index(cursor)
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
@@ -0,0 +1,161 @@
+"""
+Request coalescing (single-flight)
+
+When many clients ask for the same uncached result at once, only the first
+request computes it; identical requests arriving meanwhile wait and share
+its result instead of running the same SQL and JSON rendering again.
+
+Within a worker, callers of SingleFlight.run() with the same key wait on
+the leader's computation. With a lock_path, the leader also holds a lock
+across workers (a one-byte POSIX record lock in a shared lock file, at an
+offset hashed from the key), so computations whose result lands in a
+shared store (see response_cache) run once per host: the other workers
+poll the lock, then find the result stored. Record locks are released by
+the kernel if a worker dies, so a killed leader never wedges the others.
+
+Nobody waits longer than `timeout`: a caller whose leader is still busy by
+then (a slow FTS query, say) computes the result itself. Record locks
+belong to the whole process, so threads of one worker (gthread) could
+not exclude each other through them; a striped thread lock is taken
+before the record lock to cover threads whose keys share a lock offset.
+"""
+import copy
+import errno
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Distinct lock offsets in the lock file; unrelated keys share one with
+# probability 1 / LOCK_SLOTS
+LOCK_SLOTS = 1 << 20
+# Thread locks guarding the lock offsets within a worker
+THREAD_LOCK_STRIPES = 64
+# Seconds a caller waits for another one's computation before doing its own
+WAIT_TIMEOUT = 5.0
+# Bounds of the interval between attempts on a busy record lock, in seconds
+POLL_INTERVAL = 0.005
+MAX_POLL_INTERVAL = 0.1
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def _fresh_error(error):
+    """A new exception like the leader's, so waiters never re-raise (and extend) one shared object"""
+    try:
+        return copy.copy(error).with_traceback(None)
+    except Exception:
+        return RuntimeError(str(error))
+
+class SingleFlight:
+    """One computation per key at a time; concurrent callers share its outcome"""
+
+    def __init__(self, lock_path=None, timeout=WAIT_TIMEOUT):
+        self.lock_path = Path(lock_path) if lock_path else None
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stripes = [threading.Lock() for _ in range(THREAD_LOCK_STRIPES)]
+        self._fd = None
+        self._pid = None
+
+    def run(self, key, compute):
+        """
+        compute() for the first caller of a key, whose result (or a copy of
+        its exception) is also handed to callers that arrive before it
+        finishes; a caller still waiting after `timeout` runs compute() itself
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                return compute()
+            if flight.error is not None:
+                raise _fresh_error(flight.error) from flight.error
+            return flight.result
+
+        try:
+            with self._worker_lock(key):
+                flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _lock_file(self):
+        # Record locks belong to the process, so each worker opens its own
+        # descriptor; one inherited across a fork is not reused
+        with self._lock:
+            if self._fd is None or self._pid != os.getpid():
+                # Private to this user, like the cache it guards
+                fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    os.fchmod(fd, 0o600)
+                except OSError:
+                    os.close(fd)
+                    raise
+                self._fd, self._pid = fd, os.getpid()
+            return self._fd
+
+    @staticmethod
+    def _try_lock(fd, offset, deadline):
+        """Poll the record lock until it is taken (True) or the deadline passes (False)"""
+        interval = POLL_INTERVAL
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                return True
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    @contextmanager
+    def _worker_lock(self, key):
+        """Hold the key's lock across workers for the block, or give up on it after `timeout`"""
+        if self.lock_path is None:
+            yield
+            return
+
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        offset = int.from_bytes(digest[:8], 'big') % LOCK_SLOTS
+        deadline = time.monotonic() + self.timeout
+
+        stripe = self._stripes[offset % THREAD_LOCK_STRIPES]
+        if not stripe.acquire(timeout=self.timeout):
+            yield
+            return
+        try:
+            try:
+                fd = self._lock_file()
+                locked = self._try_lock(fd, offset, deadline)
+            except OSError:
+                # An unusable lock file only costs coalescing across workers
+                locked = False
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+        finally:
+            stripe.release()
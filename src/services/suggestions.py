@@ -0,0 +1,153 @@
+"""
+Type-ahead suggestions for book names and references
+
+Book names, abbreviations and English names (see book_names) are folded
+into a prefix trie whose nodes hold their ranked completions, so completing
+a book is one walk down the trie. Once the input names a chapter or verse,
+the numbers are completed within the bounds of the in-memory corpus:
+'Sl 11' suggests Salmos 11 and Salmos 110–119, 'Jo 3:1' suggests João 3:1
+and João 3:10–19. Nothing here touches SQLite.
+"""
+import re
+
+from src.services.book_names import (
+    BOOK_NAMES, MIN_PARTIAL_LENGTH, book_abbreviation, fold_book_name, resolve_book_order
+)
+
+MAX_SUGGESTIONS = 10
+
+# Book text, then an optional chapter and a (possibly empty) verse prefix
+QUERY_PATTERN = re.compile(r'^((?:[1-3]\s*)?[^\W\d_][^\d:.]*?)\.?\s*(?:(\d{1,3})(?:[:.](\d{0,3}))?)?$')
+
+class _TrieNode:
+    __slots__ = ('children', 'exact', 'candidates', 'completions')
+
+    def __init__(self):
+        self.children = {}
+        self.exact = set()      # books with an alias ending here
+        self.candidates = {}    # book order -> best alias kind below this node
+        self.completions = ()   # ranked book orders, filled in by BookTrie
+
+class BookTrie:
+    """Prefix trie over folded book aliases, with ranked completions per node"""
+
+    def __init__(self, book_names=BOOK_NAMES, limit=MAX_SUGGESTIONS):
+        self.root = _TrieNode()
+        # Alias kinds, best first: Portuguese name, abbreviation, English name, other
+        for order, name, abbreviation, english, aliases in book_names:
+            for kind, alias in [(0, name), (1, abbreviation), (2, english)] + [(3, alias) for alias in aliases]:
+                self._insert(fold_book_name(alias), order, kind)
+
+        # Rank once: alias kind, then canonical order
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            node.completions = tuple(sorted(node.candidates, key=lambda order: (node.candidates[order], order))[:limit])
+            node.candidates = None
+            nodes.extend(node.children.values())
+
+    def _insert(self, key, order, kind):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.candidates[order] = min(kind, node.candidates.get(order, kind))
+        node.exact.add(order)
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Book orders whose aliases start with a folded prefix, exact aliases first"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        exact = sorted(node.exact)
+        return (exact + [order for order in node.completions if order not in node.exact])[:limit]
+
+BOOK_TRIE = BookTrie()
+
+def complete_number(prefix, maximum, limit=MAX_SUGGESTIONS):
+    """
+    Inclusive (first, last) runs of 1..maximum that start with a typed prefix:
+    '11' of 150 -> (11, 11), (110, 119); '' -> (1, 9), (10, 19), ...
+    """
+    if not prefix:
+        runs = [(1, min(9, maximum))] if maximum >= 1 else []
+        runs.extend((first, min(first + 9, maximum)) for first in range(10, maximum + 1, 10))
+        return runs[:limit]
+    if prefix.startswith('0'):
+        return []
+
+    number = int(prefix)
+    runs = [(number, number)] if number <= maximum else []
+    scale = 10
+    while number * scale <= maximum and len(runs) < limit:
+        first = number * scale
+        runs.append((first, min(first + scale - 1, maximum)))
+        scale *= 10
+    return runs
+
+def _span(first, last):
+    return str(first) if first == last else f'{first}–{last}'
+
+def book_suggestion(book):
+    return {
+        'id': book['id'],
+        'name': book['name'],
+        'abbrev': book_abbreviation(book['order']),
+        'testament': book['testament'],
+        'type': 'book',
+        'text': book['name']
+    }
+
+def suggest(corpus, query, limit=MAX_SUGGESTIONS):
+    """Ranked suggestion dicts (books, chapters or verses) for a partial query"""
+    match = QUERY_PATTERN.match(query.strip())
+    if not match:
+        return []
+    book_text, chapter, verse = match.groups()
+
+    if chapter is None:
+        key = fold_book_name(book_text)
+        if len(key) < MIN_PARTIAL_LENGTH:
+            return []
+        orders = BOOK_TRIE.complete(key, limit)
+        # The book a full lookup picks comes first ('Jo' is João before Jó);
+        # it also covers misspellings that no alias starts with
+        best = resolve_book_order(book_text)
+        if best:
+            orders = ([best] + [order for order in orders if order != best])[:limit]
+        books = [corpus.get_book_by_order(order) for order in orders]
+        return [book_suggestion(book) for book in books if book]
+
+    book = corpus.get_book_by_order(resolve_book_order(book_text))
+    if not book:
+        return []
+
+    if verse is None:
+        return [
+            {
+                'type': 'chapter' if first == last else 'chapter_range',
+                'text': f"{book['name']} {_span(first, last)}",
+                'book_id': book['id'],
+                'chapter_start': first,
+                'chapter_end': last
+            }
+            for first, last in complete_number(chapter, book['chapters_count'], limit)
+        ]
+
+    chapter = int(chapter)
+    last_verse = corpus.chapter_last_verse(book['id'], chapter)
+    if last_verse is None:
+        return []
+    return [
+        {
+            'type': 'verse' if first == last else 'verse_range',
+            'text': f"{book['name']} {chapter}:{_span(first, last)}",
+            'book_id': book['id'],
+            'chapter': chapter,
+            'verse_start': first,
+            'verse_end': last
+        }
+        for first, last in complete_number(verse, last_verse, limit)
+    ]
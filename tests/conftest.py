@@ -0,0 +1,69 @@
+import itertools
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.bible import db, upgrade_schema
+from src.routes.annotations import annotations_bp
+from src.routes.bible import bible_bp
+from src.routes.search import search_bp
+from src.services import corpus as corpus_module
+from src.services.book_names import BOOK_NAMES
+from src.services.corpus import Corpus
+
+# Chapters of the books the tests read; other books get 3
+CHAPTER_COUNTS = {1: 50, 19: 150, 43: 21, 45: 16, 66: 22}
+VERSES_PER_CHAPTER = 20
+
+@pytest.fixture
+def app(tmp_path):
+    """API app on an in-memory ORM database"""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://', RESPONSE_CACHE_DIR=str(tmp_path))
+    db.init_app(app)
+    app.register_blueprint(bible_bp, url_prefix='/api')
+    app.register_blueprint(annotations_bp, url_prefix='/api')
+    app.register_blueprint(search_bp, url_prefix='/api')
+
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture(scope='session')
+def corpus():
+    """Every book, with VERSES_PER_CHAPTER verses per chapter; verse ids count up in canonical order"""
+    books = tuple(
+        {
+            'id': order,
+            'name': name,
+            'testament': 'Antigo Testamento' if order <= 39 else 'Novo Testamento',
+            'order': order,
+            'chapters_count': CHAPTER_COUNTS.get(order, 3)
+        }
+        for order, name, *_ in BOOK_NAMES
+    )
+    verse_ids = itertools.count(1)
+    rows = [
+        (book['id'], chapter, verse, next(verse_ids), 'NVI', f"{book['name']} {chapter}:{verse}")
+        for book in books
+        for chapter in range(1, book['chapters_count'] + 1)
+        for verse in range(1, VERSES_PER_CHAPTER + 1)
+    ]
+    return Corpus._from_rows(books, rows)
+
+@pytest.fixture
+def scripture(corpus, monkeypatch):
+    """Serve the test corpus from get_corpus()"""
+    monkeypatch.setattr(corpus_module, '_corpus', corpus)
+    return corpus
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from src.models.bible import db, Annotation
+from src.services.pagination import encode_cursor
+from tests.test_annotations import seed_annotations
+
+def sync(client, token=None, limit=100):
+    """(changed ids, deleted ids, body data) of one /annotations/changes call"""
+    url = f'/api/annotations/changes?limit={limit}' + (f'&since={token}' if token else '')
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    return [row['id'] for row in data['changed']], [row['id'] for row in data['deleted']], data
+
+def add_annotation(verse, stamp):
+    annotation = Annotation(verse_id=verse[0], verse_key=verse[1], type='note',
+                            created_at=stamp, updated_at=stamp)
+    db.session.add(annotation)
+    db.session.commit()
+    return annotation.id
+
+def test_change_committed_out_of_timestamp_order_is_not_skipped(client):
+    verses = seed_annotations(0)
+    _, _, data = sync(client)
+
+    # Worker A stamps its row first but commits after worker B, and a
+    # client syncs in between
+    late = add_annotation(verses[1], datetime(2025, 1, 1, 12, 0, 2))
+    changed, _, data = sync(client, data['next_token'])
+    assert changed == [late]
+    early = add_annotation(verses[0], datetime(2025, 1, 1, 12, 0, 1))
+
+    changed, _, _ = sync(client, data['next_token'])
+    assert changed == [early]
+
+def test_delete_committed_out_of_timestamp_order_is_not_skipped(client):
+    verses = seed_annotations(0)
+    first = add_annotation(verses[0], datetime(2025, 1, 1))
+    second = add_annotation(verses[1], datetime(2025, 1, 1))
+    _, _, data = sync(client)
+
+    client.delete(f'/api/annotations/{second}')
+    _, deleted, data = sync(client, data['next_token'])
+    assert deleted == [second]
+
+    # Back-dating the row does not hide its delete from the sequence
+    db.session.get(Annotation, first).updated_at = datetime(2000, 1, 1)
+    db.session.commit()
+    client.delete(f'/api/annotations/{first}')
+
+    changed, deleted, _ = sync(client, data['next_token'])
+    assert (changed, deleted) == ([], [first])
+
+def test_changes_and_deletes_share_one_limit(client):
+    seed_annotations(4)
+    for annotation_id in (1, 2):
+        client.delete(f'/api/annotations/{annotation_id}')
+
+    seen_changed, seen_deleted, token = [], [], None
+    while True:
+        changed, deleted, data = sync(client, token, limit=2)
+        assert len(changed) + len(deleted) <= 2
+        seen_changed += changed
+        seen_deleted += deleted
+        token = data['next_token']
+        if not data['has_more']:
+            break
+
+    assert sorted(seen_changed) == [3, 4]
+    assert sorted(seen_deleted) == [1, 2]
+
+def test_recreated_id_drops_its_tombstone(client):
+    verses = seed_annotations(1)
+    client.delete('/api/annotations/1')
+    # SQLite hands out the id of the deleted last row again
+    assert add_annotation(verses[1], datetime(2025, 1, 2)) == 1
+
+    changed, deleted, _ = sync(client)
+    assert (changed, deleted) == ([1], [])
+
+def test_update_moves_annotation_to_the_end(client):
+    seed_annotations(3)
+    _, _, data = sync(client)
+
+    client.put('/api/annotations/1', json={'note_text': 'editada'})
+
+    changed, _, _ = sync(client, data['next_token'])
+    assert changed == [1]
+
+def test_old_token_format_is_rejected(client):
+    token = encode_cursor(['2025-01-01T00:00:00', 1, None, 0])
+
+    assert client.get(f'/api/annotations/changes?since={token}').status_code == 400
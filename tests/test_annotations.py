@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from src.models.bible import db, Annotation, Book, Chapter, Verse
+from src.services.verse_key import make_verse_key
+
+def seed_annotations(count):
+    """`count` annotations, each on its own verse, spread over several books"""
+    verses = []
+    for order in range(1, 6):
+        book = Book(name=f'Livro {order}', abbreviation=f'L{order}', testament='old',
+                    order=order, chapters_count=2)
+        db.session.add(book)
+        db.session.flush()
+        for number in (1, 2):
+            chapter = Chapter(book_id=book.id, number=number, verses_count=10)
+            db.session.add(chapter)
+            db.session.flush()
+            for verse_number in range(1, 11):
+                verse = Verse(chapter_id=chapter.id, number=verse_number, text=f'{order} {number}:{verse_number}',
+                              verse_key=make_verse_key(order, number, verse_number))
+                db.session.add(verse)
+                verses.append(verse)
+    db.session.flush()
+
+    created_at = datetime(2025, 1, 1)
+    for i in range(count):
+        verse = verses[i]
+        db.session.add(Annotation(verse_id=verse.id, verse_key=verse.verse_key, type='note',
+                                  note_text=f'n{i}', created_at=created_at + timedelta(minutes=i)))
+    verse_ids = [(verse.id, verse.verse_key) for verse in verses]
+    db.session.commit()
+    # Nothing stays loaded in the identity map, so lazy loads would show up
+    db.session.remove()
+    return verse_ids
+
+def count_statements(client, url):
+    """(SQL statements executed, JSON body) of a GET request"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+def test_listing_query_count_does_not_grow_with_page_size(client):
+    seed_annotations(60)
+
+    small_count, small = count_statements(client, '/api/annotations?limit=1')
+    large_count, large = count_statements(client, '/api/annotations?limit=50')
+
+    assert len(small['data']) == 1
+    assert len(large['data']) == 50
+    assert small_count == large_count
+
+def test_listing_serializes_verse_chapter_and_book(client):
+    seed_annotations(3)
+
+    _, body = count_statements(client, '/api/annotations?limit=1')
+
+    annotation = body['data'][0]
+    assert annotation['note_text'] == 'n2'
+    assert annotation['verse_text'] == '1 1:3'
+    assert annotation['verse_reference'] == 'Livro 1 1:3'
+
+def test_verse_annotations_query_count_does_not_grow(client):
+    verse_id, verse_key = seed_annotations(1)[0]
+    one_count, _ = count_statements(client, f'/api/verses/{verse_id}/annotations')
+
+    for _ in range(20):
+        db.session.add(Annotation(verse_id=verse_id, verse_key=verse_key, type='highlight'))
+    db.session.commit()
+    db.session.remove()
+    many_count, body = count_statements(client, f'/api/verses/{verse_id}/annotations')
+
+    assert len(body['data']['annotations']) == 21
+    assert one_count == many_count
+
+def fetch_pages(client, url, after=None):
+    """Notes of each page of a cursor-paginated listing; after(page) runs between fetches"""
+    pages, cursor = [], None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([annotation['note_text'] for annotation in body['data']])
+        cursor = body['pagination']['next_cursor']
+        assert (cursor is not None) == body['pagination']['has_more']
+        if cursor is None:
+            return pages
+        if after:
+            after(len(pages))
+
+def test_cursor_pages_are_newest_first_without_gaps(client):
+    seed_annotations(25)
+
+    pages = fetch_pages(client, '/api/annotations?limit=7')
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert sum(pages, []) == [f'n{i}' for i in reversed(range(25))]
+
+def test_cursor_breaks_created_at_ties_by_id(client):
+    verses = seed_annotations(0)
+    created_at = datetime(2025, 1, 1)
+    for i, (verse_id, verse_key) in enumerate(verses[:9]):
+        db.session.add(Annotation(verse_id=verse_id, verse_key=verse_key, type='note',
+                                  note_text=f't{i}', created_at=created_at))
+    db.session.commit()
+
+    pages = fetch_pages(client, '/api/annotations?limit=2')
+
+    assert sum(pages, []) == [f't{i}' for i in reversed(range(9))]
+
+def test_cursor_pages_are_stable_under_concurrent_inserts(client):
+    verses = seed_annotations(20)
+    first_page_end = datetime(2025, 1, 1) + timedelta(minutes=15)
+
+    def insert(note_text, created_at, verse):
+        db.session.add(Annotation(verse_id=verse[0], verse_key=verse[1], type='note',
+                                  note_text=note_text, created_at=created_at))
+        db.session.commit()
+        db.session.remove()
+
+    def insert_between_pages(page_count):
+        if page_count == 1:
+            # Newer than the first page, and tied with its last row at a
+            # higher id: both sort before the cursor, so neither shows up
+            insert('newer', datetime(2026, 1, 1), verses[30])
+            insert('tied', first_page_end, verses[31])
+            # Older than every row so far: still ahead of the cursor
+            insert('older', datetime(2024, 1, 1), verses[32])
+
+    pages = fetch_pages(client, '/api/annotations?limit=5', after=insert_between_pages)
+    notes = sum(pages, [])
+
+    assert pages[0] == ['n19', 'n18', 'n17', 'n16', 'n15']
+    assert notes == [f'n{i}' for i in reversed(range(20))] + ['older']
+    assert len(set(notes)) == len(notes)
+
+def test_cursor_pages_keep_the_filter(client):
+    verses = seed_annotations(10)
+    for verse_id, verse_key in verses[10:14]:
+        db.session.add(Annotation(verse_id=verse_id, verse_key=verse_key, type='highlight',
+                                  created_at=datetime(2025, 6, 1)))
+    db.session.commit()
+
+    pages = fetch_pages(client, '/api/annotations?type=note&limit=3')
+
+    assert sum(pages, []) == [f'n{i}' for i in reversed(range(10))]
+
+def test_malformed_cursor_is_rejected(client):
+    seed_annotations(3)
+
+    for cursor in ('garbage', 'eyJhIjogMX0'):
+        response = client.get(f'/api/annotations?limit=1&cursor={cursor}')
+        assert response.status_code == 400
+        assert response.get_json() == {'success': False, 'error': 'Invalid cursor'}
@@ -0,0 +1,43 @@
+import pytest
+
+from src.services.book_names import book_abbreviation, fold_book_name, lookup_book_order, resolve_book_order
+
+@pytest.mark.parametrize('name, order', [
+    # Names, with or without accents, and abbreviations
+    ('Gênesis', 1), ('genesis', 1), ('GÊNESIS', 1), ('Gn', 1),
+    ('João', 43), ('Joao', 43), ('Jo', 43), ('Jó', 18),
+    ('1 Coríntios', 46), ('1Co', 46), ('1 Co.', 46), ('I Coríntios', 46), ('II Coríntios', 47),
+    ('Cântico dos Cânticos', 22), ('Oseias', 28), ('Salmo', 19),
+    # English names
+    ('Psalms', 19), ('Song of Songs', 22), ('1 John', 62),
+    # Prefixes of a name, the earliest book winning
+    ('Gen', 1), ('Apoc', 66), ('Ju', 7), ('Sal', 19), ('Fil', 50),
+    # Prefixes of a later word of a name
+    ('Coríntios', 46), ('Corin', 46), ('Samuel', 9), ('Reis', 11), ('Tessalonicenses', 52),
+    ('Apóstolos', 44),
+    # Misspellings
+    ('Genesys', 1), ('Apocalipce', 66), ('Deuteronomio', 5), ('Levitico', 3),
+])
+def test_resolve_book_order(name, order):
+    assert resolve_book_order(name) == order
+
+@pytest.mark.parametrize('word', ['fé', 'fe', 'rei', 'amor', 'paz', 'luz', 'deus', 'x', '', 'sam'])
+def test_short_words_are_not_books(word):
+    assert resolve_book_order(word) is None
+
+@pytest.mark.parametrize('name, order', [
+    ('Gênesis', 1), ('genesis', 1), ('Gn', 1), ('1 co', 46), ('Gen', None), ('Corintios', None),
+])
+def test_lookup_book_order_is_exact(name, order):
+    assert lookup_book_order(name) == order
+
+@pytest.mark.parametrize('name, folded', [
+    ('João', 'joao'), ('1 Co.', '1co'), ('II Reis', '2reis'), ('Cânticos', 'canticos'),
+])
+def test_fold_book_name(name, folded):
+    assert fold_book_name(name) == folded
+
+def test_book_abbreviation():
+    assert book_abbreviation(43) == 'Jo'
+    assert book_abbreviation(46) == '1Co'
+    assert book_abbreviation(67) is None
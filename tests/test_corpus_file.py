@@ -0,0 +1,143 @@
+import hashlib
+import json
+import sqlite3
+
+import pytest
+
+from src.services import corpus as corpus_module
+from src.services.corpus import CORPUS_FILE_HEADER, Corpus, _padded, open_corpus
+
+BOOKS = (
+    {'id': 1, 'name': 'Gênesis', 'testament': 'Antigo Testamento', 'order': 1, 'chapters_count': 2},
+    {'id': 43, 'name': 'João', 'testament': 'Novo Testamento', 'order': 43, 'chapters_count': 1},
+)
+ROWS = [
+    (1, 1, 1, 1, 'NVI', 'No princípio'),
+    (1, 1, 2, 2, 'NVI', 'Era a terra'),
+    (1, 2, 1, 3, 'NVI', 'Assim foram concluídos'),
+    (43, 1, 1, 4, 'ARA', 'No princípio era o Verbo'),
+]
+
+def build_corpus(rows=ROWS):
+    corpus = Corpus._from_rows(BOOKS, rows)
+    corpus.source_stamp = (1234, 5678)
+    return corpus
+
+def snapshot(corpus):
+    return [
+        (book['id'], chapter, corpus.get_chapter_verses(book['id'], chapter))
+        for book in corpus.books
+        for chapter in range(1, book['chapters_count'] + 1)
+    ]
+
+@pytest.mark.parametrize('rows', [
+    ROWS,
+    # Ids out of canonical order need the sorted id index
+    [row[:3] + (5 - row[3],) + row[4:] for row in ROWS],
+])
+def test_round_trip(tmp_path, rows):
+    corpus = build_corpus(rows)
+    path = tmp_path / 'corpus.bin'
+    corpus.write_file(path)
+
+    mapped = Corpus.from_file(path)
+
+    assert mapped.digest == corpus.digest
+    assert mapped.source_stamp == (1234, 5678)
+    assert mapped.books == corpus.books
+    assert snapshot(mapped) == snapshot(corpus)
+    assert [mapped.get_verse(verse_id) for verse_id in range(1, 5)] == \
+        [corpus.get_verse(verse_id) for verse_id in range(1, 5)]
+    assert not (tmp_path / 'corpus.bin.tmp').exists()
+
+def rewrite_metadata(path, metadata):
+    """Replace the metadata section, with a digest that matches the result"""
+    data = bytearray(path.read_bytes())
+    fields = list(CORPUS_FILE_HEADER.unpack_from(data, 0))
+    meta_size = fields[6]
+    rest = data[CORPUS_FILE_HEADER.size + _padded(meta_size):]
+
+    encoded = json.dumps(metadata).encode('utf-8')
+    body = encoded + b'\0' * (_padded(len(encoded)) - len(encoded)) + rest
+    fields[6], fields[8] = len(encoded), hashlib.sha256(body).digest()
+    path.write_bytes(CORPUS_FILE_HEADER.pack(*fields) + body)
+
+def corrupt_byte(data, position):
+    data[position] ^= 0xFF
+
+@pytest.mark.parametrize('damage, message', [
+    (lambda data: data[:CORPUS_FILE_HEADER.size - 1], 'truncated'),
+    (lambda data: data[:-4], 'digest'),
+    (lambda data: data + b'\0\0\0\0', 'digest'),
+    (lambda data: (corrupt_byte(data, len(data) - 1), data)[1], 'digest'),
+    # A damaged metadata section fails the digest before it is parsed
+    (lambda data: (corrupt_byte(data, CORPUS_FILE_HEADER.size), data)[1], 'digest'),
+    (lambda data: b'NOTACORP' + data[8:], 'not a compiled corpus'),
+    (lambda data: data[:8] + b'\x63\x00' + data[10:], 'format 99'),
+    (lambda data: b'', 'empty'),
+])
+def test_damaged_file(tmp_path, damage, message):
+    path = tmp_path / 'corpus.bin'
+    build_corpus().write_file(path)
+    path.write_bytes(bytes(damage(bytearray(path.read_bytes()))))
+
+    with pytest.raises(ValueError, match=message):
+        Corpus.from_file(path)
+
+@pytest.mark.parametrize('metadata', [
+    {'books': list(BOOKS), 'versions': ['NVI', 'ARA']},
+    {'books': list(BOOKS), 'ids_sorted': True},
+    {'books': [{'id': 1}, {'id': 43}], 'versions': ['NVI', 'ARA'], 'ids_sorted': True},
+    {'books': 1, 'versions': ['NVI', 'ARA'], 'ids_sorted': True},
+    ['books'],
+])
+def test_invalid_metadata(tmp_path, metadata):
+    path = tmp_path / 'corpus.bin'
+    build_corpus().write_file(path)
+    rewrite_metadata(path, metadata)
+
+    with pytest.raises(ValueError, match='invalid metadata'):
+        Corpus.from_file(path)
+
+@pytest.fixture
+def scripture_files(tmp_path, monkeypatch):
+    """A scripture database with ROWS and where its compiled file would go"""
+    db_path, corpus_path = tmp_path / 'bible.db', tmp_path / 'corpus.bin'
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE books (id, name, testament, book_order, chapters_count)')
+    conn.execute('CREATE TABLE verses (book_id, chapter_number, verse_number, id, version, text, verse_key)')
+    conn.executemany('INSERT INTO books VALUES (?, ?, ?, ?, ?)', [
+        (book['id'], book['name'], book['testament'], book['order'], book['chapters_count']) for book in BOOKS
+    ])
+    conn.executemany('INSERT INTO verses VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        row + (book_id * 1000000 + chapter * 1000 + verse,) for row in ROWS for book_id, chapter, verse in [row[:3]]
+    ])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(corpus_module, 'SCRIPTURE_DB_PATH', db_path)
+    monkeypatch.setattr(corpus_module, 'CORPUS_FILE_PATH', corpus_path)
+    return db_path, corpus_path
+
+def test_open_corpus_maps_a_current_file(scripture_files):
+    db_path, corpus_path = scripture_files
+    Corpus.from_database(db_path).write_file(corpus_path)
+
+    corpus = open_corpus()
+
+    assert isinstance(corpus._text, memoryview)
+    assert snapshot(corpus) == snapshot(build_corpus())
+
+@pytest.mark.parametrize('damage', [
+    lambda path: path.write_bytes(path.read_bytes()[:-1]),
+    lambda path: rewrite_metadata(path, {'books': list(BOOKS)}),
+])
+def test_open_corpus_falls_back_to_the_database(scripture_files, damage):
+    db_path, corpus_path = scripture_files
+    Corpus.from_database(db_path).write_file(corpus_path)
+    damage(corpus_path)
+
+    corpus = open_corpus()
+
+    assert isinstance(corpus._text, bytes)
+    assert snapshot(corpus) == snapshot(build_corpus())
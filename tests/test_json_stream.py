@@ -0,0 +1,27 @@
+import io
+import json
+
+import pytest
+
+from src.services import json_stream
+from src.services.json_stream import iter_json_array
+
+NUMBERS = '[12.5, -3e2, 4.25E-1, 7]'
+
+@pytest.mark.parametrize('pad', range(json_stream.CHUNK_SIZE - 16, json_stream.CHUNK_SIZE))
+def test_number_straddling_chunk_boundary(pad):
+    # Each padding length moves the first chunk boundary to another place in the numbers
+    document = f'["{"x" * pad}", 1.5, 2e3, -0.25e-2, 3]'
+
+    assert list(iter_json_array(io.StringIO(document))) == json.loads(document)
+
+@pytest.mark.parametrize('chunk_size', range(1, len(NUMBERS) + 1))
+def test_numbers_at_every_chunk_size(monkeypatch, chunk_size):
+    monkeypatch.setattr(json_stream, 'CHUNK_SIZE', chunk_size)
+
+    assert list(iter_json_array(io.StringIO(NUMBERS))) == json.loads(NUMBERS)
+
+def test_array_under_key():
+    document = '{"version": 1.5, "books": [{"name": "Gênesis"}, 2.5], "extra": true}'
+
+    assert list(iter_json_array(io.StringIO(document), key='books')) == [{'name': 'Gênesis'}, 2.5]
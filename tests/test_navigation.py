@@ -0,0 +1,40 @@
+import pytest
+
+from src.services import http_cache
+
+@pytest.mark.parametrize('url, data', [
+    ('/api/navigation/1/2', {'previous': {'book_id': 1, 'chapter': 1}, 'next': {'book_id': 1, 'chapter': 3}}),
+    ('/api/navigation/1/50', {'previous': {'book_id': 1, 'chapter': 49},
+                              'next': {'book_id': 2, 'chapter': 1, 'book_name': 'Êxodo'}}),
+    ('/api/navigation/1/1', {'previous': None, 'next': {'book_id': 1, 'chapter': 2}}),
+    ('/api/navigation/66/22', {'previous': {'book_id': 66, 'chapter': 21}, 'next': None}),
+])
+def test_navigation(client, scripture, url, data):
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.get_json()['data'] == data
+    assert response.headers['ETag']
+
+@pytest.mark.parametrize('url', ['/api/navigation/1/999', '/api/navigation/1/0', '/api/navigation/67/1'])
+def test_navigation_for_a_missing_chapter(client, scripture, url):
+    response = client.get(url)
+
+    assert response.status_code == 404
+    assert response.get_json() == {'success': False, 'error': 'Chapter not found'}
+    assert 'ETag' not in response.headers
+
+def test_navigation_revalidates(client, scripture):
+    etag = client.get('/api/navigation/43/3').headers['ETag']
+
+    assert client.get('/api/navigation/43/3', headers={'If-None-Match': etag}).status_code == 304
+
+def test_unavailable_corpus_is_a_json_error(client, monkeypatch):
+    def unavailable():
+        raise FileNotFoundError('bible.db not found')
+    monkeypatch.setattr(http_cache, 'get_corpus', unavailable)
+
+    response = client.get('/api/navigation/1/1')
+
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'bible.db not found'}
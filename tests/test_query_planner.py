@@ -0,0 +1,42 @@
+import pytest
+
+from src.services.query_planner import PLAN_MIXED, PLAN_REFERENCE, PLAN_TEXT, describe_plan, plan_query
+
+@pytest.mark.parametrize('query, key_ranges', [
+    ('Jo 3:16-18; 4:1', [(43003016, 43003018), (43004001, 43004001)]),
+    ('Sl 23', [(19023000, 19023999)]),
+    ('Gn 1 - Ap 22', [(1001000, 66022999)]),
+    # Fuzzy book names once the query is not a mixed one
+    ('Genesys 1', [(1001000, 1001999)]),
+    ('  João 3:16  ', [(43003016, 43003016)]),
+])
+def test_reference_plans(query, key_ranges):
+    plan = plan_query(query)
+
+    assert plan['type'] == PLAN_REFERENCE
+    assert plan['key_ranges'] == key_ranges
+
+@pytest.mark.parametrize('query, text, scope, key_ranges', [
+    ('amor em 1 Coríntios', 'amor', '1 Coríntios', [(46000000, 46999999)]),
+    ('fé Hebreus 11', 'fé', 'Hebreus 11', [(58011000, 58011999)]),
+    ('paz no Sl 23', 'paz', 'Sl 23', [(19023000, 19023999)]),
+    ('o amor de Deus em Romanos', 'o amor de Deus', 'Romanos', [(45000000, 45999999)]),
+])
+def test_mixed_plans(query, text, scope, key_ranges):
+    plan = plan_query(query)
+
+    assert (plan['type'], plan['text'], plan['scope']) == (PLAN_MIXED, text, scope)
+    assert plan['key_ranges'] == key_ranges
+
+@pytest.mark.parametrize('query', [
+    'amor ao próximo', 'fé em Deus', 'fé 1', 'amor em Xyz', 'fé Hebreus', 'amor em',
+])
+def test_text_plans(query):
+    assert plan_query(query) == {'type': PLAN_TEXT, 'text': query}
+
+def test_describe_plan():
+    assert describe_plan(plan_query('fé Hebreus 11')) == {
+        'type': PLAN_MIXED, 'text': 'fé', 'scope': 'Hebreus 11',
+        'ranges': [{'start': 58011000, 'end': 58011999}]
+    }
+    assert describe_plan(plan_query('amor')) == {'type': PLAN_TEXT, 'text': 'amor'}
@@ -0,0 +1,76 @@
+import pytest
+
+from src.services.references import (
+    parse_reference, range_key_range, reference_key_ranges, resolve_reference, unresolved_book
+)
+
+@pytest.mark.parametrize('reference, expected', [
+    ('João 3:16', [('João', 3, 16, 3, 16, 'João')]),
+    ('Gn 1.1-3', [('Gn', 1, 1, 1, 3, 'Gn')]),
+    ('Salmos 23', [('Salmos', 23, None, 23, None, 'Salmos')]),
+    ('Jo 3:16-18; 4:1-3', [('Jo', 3, 16, 3, 18, 'Jo'), ('Jo', 4, 1, 4, 3, 'Jo')]),
+    ('Jo 3:16, 18, 20-21', [('Jo', 3, 16, 3, 16, 'Jo'), ('Jo', 3, 18, 3, 18, 'Jo'),
+                            ('Jo', 3, 20, 3, 21, 'Jo')]),
+    ('Sl 23; 91', [('Sl', 23, None, 23, None, 'Sl'), ('Sl', 91, None, 91, None, 'Sl')]),
+    ('Sl 1-3', [('Sl', 1, None, 3, None, 'Sl')]),
+    ('Sl 23, 91', [('Sl', 23, None, 23, None, 'Sl'), ('Sl', 91, None, 91, None, 'Sl')]),
+    ('Rm 8:28-9:5', [('Rm', 8, 28, 9, 5, 'Rm')]),
+    ('Jo 3:16; Rm 8:28', [('Jo', 3, 16, 3, 16, 'Jo'), ('Rm', 8, 28, 8, 28, 'Rm')]),
+    ('1 Co 13', [('1 Co', 13, None, 13, None, '1 Co')]),
+    ('1Co 13:4-7', [('1Co', 13, 4, 13, 7, '1Co')]),
+    ('Gn 1 - Ap 22', [('Gn', 1, None, 22, None, 'Ap')]),
+    ('Gn 50:22 - Ex 2:10', [('Gn', 50, 22, 2, 10, 'Ex')]),
+    ('Ml 4 – Mt 1:17', [('Ml', 4, None, 1, 17, 'Mt')]),
+    ('2 Rs 25 - 1 Cr 1', [('2 Rs', 25, None, 1, None, '1 Cr')]),
+    ('Gn 50 - Ex 1; 3', [('Gn', 50, None, 1, None, 'Ex'), ('Ex', 3, None, 3, None, 'Ex')]),
+])
+def test_parse_reference(reference, expected):
+    assert parse_reference(reference) == expected
+
+@pytest.mark.parametrize('reference', [
+    '', '3:16', 'João', 'amor ao próximo', 'Jo 3:18-16', 'Jo 3:16; amor', 'Gn 1-2 - Ex 3', 'Gn 1 - Ex',
+])
+def test_parse_reference_rejects(reference):
+    assert parse_reference(reference) is None
+
+@pytest.mark.parametrize('reference, expected', [
+    ('Jo 3:16', [(43003016, 43003016)]),
+    ('Salmos 23', [(19023000, 19023999)]),
+    ('Rm 8:28-9:5', [(45008028, 45009005)]),
+    ('Jo 3:16-18; 4:1-3', [(43003016, 43003018), (43004001, 43004003)]),
+    ('Sl 23; 91', [(19023000, 19023999), (19091000, 19091999)]),
+    ('Gn 1 - Ap 22', [(1001000, 66022999)]),
+    ('Gn 50:22 - Ex 2:10', [(1050022, 2002010)]),
+    ('Joao 3:16', [(43003016, 43003016)]),
+    ('1 Coríntios 13', [(46013000, 46013999)]),
+])
+def test_reference_key_ranges(reference, expected):
+    assert reference_key_ranges(parse_reference(reference)) == expected
+
+def test_cross_book_range_must_go_forward():
+    assert range_key_range(parse_reference('Ap 1 - Gn 1')[0]) is None
+
+def test_unresolved_book_names_the_unknown_side():
+    ranges = parse_reference('Jo 3:16; Xyz 1 - Ap 2')
+
+    assert reference_key_ranges(ranges) is None
+    assert unresolved_book(ranges) == 'Xyz'
+    assert unresolved_book(parse_reference('Jo 3:16')) is None
+
+def test_resolve_reference_in_input_order(corpus):
+    verses = resolve_reference(corpus, 'Jo 4:1-2; 3:16')
+
+    assert [verse['reference'] for verse in verses] == ['João 4:1', 'João 4:2', 'João 3:16']
+
+def test_resolve_reference_crossing_books(corpus):
+    verses = resolve_reference(corpus, 'Gn 50:19 - Ex 1:2')
+
+    assert [verse['reference'] for verse in verses] == [
+        'Gênesis 50:19', 'Gênesis 50:20', 'Êxodo 1:1', 'Êxodo 1:2'
+    ]
+
+def test_resolve_reference_stops_at_limit(corpus):
+    verses = resolve_reference(corpus, 'Gn 1 - Ap 22; Jo 3:16', limit=25)
+
+    assert len(verses) == 25
+    assert verses[-1]['reference'] == 'Gênesis 2:5'
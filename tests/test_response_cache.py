@@ -0,0 +1,29 @@
+import os
+import stat
+
+from src.services.response_cache import (
+    RESPONSE_CACHE_FILE, RESPONSE_LOCK_FILE, get_response_cache, get_response_flight
+)
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_cache_files_are_private_to_the_app_user(app, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    app.config['RESPONSE_CACHE_DIR'] = str(cache_dir)
+
+    get_response_cache().set('key', b'{}', 60)
+    get_response_flight().run('key', lambda: None)
+
+    assert mode(cache_dir) == 0o700
+    assert mode(cache_dir / RESPONSE_CACHE_FILE) == 0o600
+    assert mode(cache_dir / RESPONSE_LOCK_FILE) == 0o600
+
+def test_existing_cache_file_is_made_private(app, tmp_path):
+    (tmp_path / RESPONSE_CACHE_FILE).touch(mode=0o666)
+    os.chmod(tmp_path / RESPONSE_CACHE_FILE, 0o666)
+
+    get_response_cache().set('key', b'{}', 60)
+
+    assert mode(tmp_path / RESPONSE_CACHE_FILE) == 0o600
+    assert get_response_cache().get('key') == b'{}'
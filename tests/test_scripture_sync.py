@@ -0,0 +1,36 @@
+import sqlite3
+
+import pytest
+
+from src.services.scripture_sync import sync_scripture
+
+BOOK = {'order': 1, 'name': 'Gênesis', 'testament': 'Antigo Testamento'}
+
+def test_sync_refuses_verses_without_verse_key():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE verses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            chapter_number INTEGER NOT NULL,
+            verse_number INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            version TEXT
+        )
+    ''')
+    conn.execute("INSERT INTO verses VALUES (7, 1, 1, 1, 'No princípio', 'NVI')")
+
+    with pytest.raises(ValueError, match='verse_key'):
+        sync_scripture(conn, [(BOOK, 1, 1, 'No princípio')], 'NVI')
+
+    # The legacy table and its ids are left untouched
+    assert conn.execute('SELECT id, text FROM verses').fetchall() == [(7, 'No princípio')]
+
+def test_sync_keeps_verse_ids():
+    conn = sqlite3.connect(':memory:')
+    sync_scripture(conn, [(BOOK, 1, 1, 'No princípio'), (BOOK, 1, 2, 'Era a terra')], 'NVI')
+    sync_scripture(conn, [(BOOK, 1, 1, 'No princípio,'), (BOOK, 1, 2, 'Era a terra')], 'NVI')
+
+    assert conn.execute('SELECT id, text FROM verses ORDER BY verse_key').fetchall() == [
+        (1, 'No princípio,'), (2, 'Era a terra')
+    ]
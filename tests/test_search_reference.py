@@ -0,0 +1,28 @@
+import pytest
+
+@pytest.mark.parametrize('url', ['/api/search/reference?ref=Jo 3:16-17; 4:1', '/api/search/quick?q=Jo 3:16-17; 4:1'])
+def test_reference_passages(client, scripture, url):
+    data = client.get(url).get_json()['data']
+
+    assert (data['book']['name'], data['book']['abbreviation'], data['chapter']) == ('João', 'Jo', 3)
+    assert [(passage['chapter'], [verse['verse_num'] for verse in passage['verses']])
+            for passage in data['passages']] == [(3, [16, 17]), (4, [1])]
+    assert data['ranges'] == [{'start': 43003016, 'end': 43003017}, {'start': 43004001, 'end': 43004001}]
+
+def test_quick_search_uses_the_planned_ranges(client, scripture):
+    body = client.get('/api/search/quick?q=Gn 50:20 - Ex 1:1').get_json()
+
+    assert body['plan'] == {'type': 'reference', 'ranges': [{'start': 1050020, 'end': 2001001}]}
+    assert [(passage['book']['name'], passage['chapter']) for passage in body['data']['passages']] == \
+        [('Gênesis', 50), ('Êxodo', 1)]
+
+@pytest.mark.parametrize('ref, error', [
+    ('Xyz 1:1', 'Livro "Xyz" não encontrado'),
+    ('Ap 1 - Gn 1', 'Referência "Ap 1 - Gn 1" não encontrada'),
+    ('Jo 30:1', 'Referência "Jo 30:1" não encontrada'),
+])
+def test_reference_not_found(client, scripture, ref, error):
+    response = client.get(f'/api/search/reference?ref={ref}')
+
+    assert response.status_code == 404
+    assert response.get_json() == {'success': False, 'error': error}
@@ -0,0 +1,123 @@
+import fcntl
+import hashlib
+import os
+import threading
+import time
+
+from src.services.single_flight import LOCK_SLOTS, THREAD_LOCK_STRIPES, SingleFlight
+
+def lock_offset(key):
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % LOCK_SLOTS
+
+def run_waiter(flight, key, compute, outcomes):
+    """Start a thread calling flight.run, appending its result or exception to outcomes"""
+    def target():
+        try:
+            outcomes.append(flight.run(key, compute))
+        except Exception as e:
+            outcomes.append(e)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+def start_leader(flight, key, result=None, error=None):
+    """A leader blocked in compute() until the returned event is set"""
+    started, release, outcomes = threading.Event(), threading.Event(), []
+
+    def compute():
+        started.set()
+        release.wait()
+        if error is not None:
+            raise error
+        return result
+
+    thread = run_waiter(flight, key, compute, outcomes)
+    started.wait()
+    return thread, release, outcomes
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    leader, release, _ = start_leader(flight, 'k', result='leader')
+    outcomes = []
+    waiters = [run_waiter(flight, 'k', lambda: 'own', outcomes) for _ in range(4)]
+
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join()
+
+    assert outcomes == ['leader'] * 4
+
+def test_each_waiter_gets_its_own_copy_of_the_error():
+    flight = SingleFlight()
+    error = ValueError('boom')
+    leader, release, leader_outcomes = start_leader(flight, 'k', error=error)
+    outcomes = []
+    waiters = [run_waiter(flight, 'k', lambda: 'own', outcomes) for _ in range(3)]
+
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join()
+
+    assert leader_outcomes == [error]
+    assert all(isinstance(e, ValueError) and e.args == ('boom',) for e in outcomes)
+    assert all(e is not error and e.__cause__ is error for e in outcomes)
+    assert len({id(e) for e in outcomes}) == 3
+
+def test_waiter_computes_itself_after_the_timeout():
+    flight = SingleFlight(timeout=0.1)
+    leader, release, _ = start_leader(flight, 'k', result='leader')
+
+    started = time.monotonic()
+    assert flight.run('k', lambda: 'own') == 'own'
+    assert time.monotonic() - started < 1
+
+    release.set()
+    leader.join()
+
+def test_lock_held_by_another_process_does_not_stall(tmp_path):
+    lock_path = tmp_path / 'flight.lock'
+    ready_read, ready_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, lock_offset('k'))
+        os.write(ready_write, b'x')
+        time.sleep(5)
+        os._exit(0)
+
+    try:
+        os.read(ready_read, 1)
+        flight = SingleFlight(lock_path, timeout=0.2)
+
+        started = time.monotonic()
+        assert flight.run('k', lambda: 'own') == 'own'
+        assert 0.2 <= time.monotonic() - started < 2
+    finally:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+
+def test_threads_with_keys_on_one_lock_stripe_exclude_each_other(tmp_path):
+    flight = SingleFlight(tmp_path / 'flight.lock')
+    active, overlaps = [], []
+
+    def compute():
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+        return 'done'
+
+    # Record locks alone would let both threads of this process through
+    other = next(key for key in (f'b{i}' for i in range(10000))
+                 if lock_offset(key) % THREAD_LOCK_STRIPES == lock_offset('a') % THREAD_LOCK_STRIPES)
+    outcomes = []
+    threads = [run_waiter(flight, key, compute, outcomes) for key in ('a', other)]
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == ['done', 'done']
+    assert max(overlaps) == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from src.services.suggestions import BOOK_TRIE, complete_number, suggest
+
+@pytest.mark.parametrize('query, texts', [
+    # Books: the resolved book first, then trie completions
+    ('Jo', ['João', 'Jó', 'Josué', 'Joel', 'Jonas']),
+    ('Gen', ['Gênesis']),
+    ('Sal', ['Salmos']),
+    ('1 co', ['1 Coríntios']),
+    ('Genesys', ['Gênesis']),
+    # Chapters within the book's bounds
+    ('Sl 11', ['Salmos 11', 'Salmos 110–119']),
+    ('Sl 15', ['Salmos 15', 'Salmos 150']),
+    ('Jo 2', ['João 2', 'João 20–21']),
+    # Verses within the chapter's bounds
+    ('Jo 3:1', ['João 3:1', 'João 3:10–19']),
+    ('Jo 3:', ['João 3:1–9', 'João 3:10–19', 'João 3:20']),
+    # Nothing to complete
+    ('J', []), ('fé', []), ('Sl 151', []), ('Sl 0', []), ('Jo 22', []), ('Jo 3:21', []), ('Xyz 1', []),
+])
+def test_suggest(corpus, query, texts):
+    assert [suggestion['text'] for suggestion in suggest(corpus, query)] == texts
+
+def test_suggestion_shapes(corpus):
+    book, = suggest(corpus, 'Gen')
+    chapter_range = suggest(corpus, 'Sl 11')[1]
+    verse = suggest(corpus, 'Jo 3:16')[0]
+
+    assert (book['type'], book['abbrev'], book['id']) == ('book', 'Gn', 1)
+    assert (chapter_range['type'], chapter_range['chapter_start'], chapter_range['chapter_end']) == \
+        ('chapter_range', 110, 119)
+    assert (verse['type'], verse['chapter'], verse['verse_start'], verse['verse_end']) == ('verse', 3, 16, 16)
+
+def test_suggest_respects_limit(corpus):
+    assert len(suggest(corpus, 'Sl 1', limit=2)) == 2
+
+@pytest.mark.parametrize('prefix, maximum, runs', [
+    ('11', 150, [(11, 11), (110, 119)]),
+    ('1', 150, [(1, 1), (10, 19), (100, 150)]),
+    ('', 25, [(1, 9), (10, 19), (20, 25)]),
+    ('3', 3, [(3, 3)]),
+    ('4', 3, []),
+    ('0', 150, []),
+])
+def test_complete_number(prefix, maximum, runs):
+    assert complete_number(prefix, maximum) == runs
+
+@pytest.mark.parametrize('prefix, first', [
+    # Books with an alias equal to the prefix come first: 'jo' is Jó and João's abbreviation
+    ('jo', [18, 43, 6]), ('joa', [43]), ('gen', [1]), ('psa', [19]), ('1co', [46]), ('ap', [66]),
+])
+def test_trie_prefixes(prefix, first):
+    assert BOOK_TRIE.complete(prefix)[:len(first)] == first
+
+def test_trie_unknown_prefix():
+    assert BOOK_TRIE.complete('xyz') == []
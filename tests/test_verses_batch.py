@@ -0,0 +1,52 @@
+import pytest
+
+from src.routes.bible import MAX_BATCH_ITEMS, MAX_BATCH_VERSES
+
+def post_batch(client, items):
+    return client.post('/api/verses/batch', json={'verses': items})
+
+def test_batch_in_input_order(client, scripture):
+    john_3_16 = scripture.get_key_range(43003016, 43003016)[0]
+
+    response = post_batch(client, ['Jo 3:16-17', john_3_16['id'], 'Xyz 1', 10 ** 9])
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert [[verse['reference'] for verse in result['verses']] for result in body['data']] == [
+        ['João 3:16', 'João 3:17'], ['João 3:16'], [], []
+    ]
+    assert body['data'][1]['query'] == john_3_16['id']
+    assert body['count'] == 3
+
+@pytest.mark.parametrize('body', [{}, {'verses': []}, {'verses': 'Jo 3:16'}, ['Jo 3:16']])
+def test_batch_requires_a_list(client, scripture, body):
+    assert client.post('/api/verses/batch', json=body).status_code == 400
+
+@pytest.mark.parametrize('item', [True, False, None, 1.5, {'id': 1}])
+def test_batch_rejects_items_that_are_not_ids_or_references(client, scripture, item):
+    response = post_batch(client, [1, item])
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'Invalid verse id or reference: {item!r}'
+
+def test_batch_item_cap(client, scripture):
+    assert post_batch(client, [1] * MAX_BATCH_ITEMS).status_code == 200
+
+    response = post_batch(client, [1] * (MAX_BATCH_ITEMS + 1))
+    assert response.status_code == 400
+    assert str(MAX_BATCH_ITEMS) in response.get_json()['error']
+
+def test_batch_verse_cap(client, scripture):
+    # 250 chapters of 20 verses in the test corpus
+    within = ['Sl 1-150', 'Gn 1-50', 'Jo 1-21', 'Rm 1-16', 'Ap 1-13']
+    assert post_batch(client, within).get_json()['count'] == MAX_BATCH_VERSES
+
+    response = post_batch(client, within + [1])
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'Batch resolves to more than {MAX_BATCH_VERSES} verses'
+
+def test_batch_verse_cap_on_one_reference(client, scripture):
+    response = post_batch(client, ['Gn 1 - Ap 22'])
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'Batch resolves to more than {MAX_BATCH_VERSES} verses'